@@ -0,0 +1,306 @@
+"""
+Policy API for automated players and a parallel headless arena.
+
+A policy sees only what a player sees, as a class_function.Observation,
+and answers with (Action, argument) pairs. The arena plays many seeded
+nights per policy across worker processes and reports survival rate, power
+efficiency and decision throughput. Every policy faces the same night
+seeds, so results are paired and identical for any --workers count.
+
+Usage:
+    python arena.py --policies idle,lights,sentry --nights 500 --workers 8 --seed 1
+
+Policies outside this module can be named as module:Class.
+"""
+
+import argparse
+import importlib
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from class_function import (Action, GameState, LocationGraph, LOCATION_GRAPH, NightSimulation,
+                            Observation, NIGHT_LENGTH, STARTING_POWER, load_difficulty_model)
+
+ARENA_DT = 1 / 60
+DECISION_INTERVAL = 0.1  # seconds of night time between policy decisions
+SEARCH_ITERATIONS = 64  # per decision for the search policy: a fixed count, not a time budget
+
+Decision = Tuple[Action, Optional[int]]
+
+
+# ============= POLICY API =============
+
+class Policy:
+    """Base class for automated players.
+
+    reset() is called before every night with a dedicated RNG; act() is
+    called every decision interval and returns the actions to apply, in order.
+    bind() hands over the night itself, for oracles that look past the
+    observation; ordinary policies ignore it.
+    """
+
+    def reset(self, rng: random.Random):
+        self.rng = rng
+
+    def bind(self, sim: NightSimulation):
+        pass
+
+    def act(self, observation: Observation) -> List[Decision]:
+        return []
+
+
+class IdlePolicy(Policy):
+    """Never touches the controls; the baseline every policy should beat"""
+
+
+class DoorsShutPolicy(Policy):
+    """Keeps both doors shut all night, trading power for safety"""
+
+    def act(self, observation: Observation) -> List[Decision]:
+        actions: List[Decision] = []
+        if not observation.left_door_closed:
+            actions.append((Action.TOGGLE_LEFT_DOOR, None))
+        if not observation.right_door_closed:
+            actions.append((Action.TOGGLE_RIGHT_DOOR, None))
+        return actions
+
+
+class LightCheckPolicy(Policy):
+    """Flashes both lights, then shuts exactly the doors someone was standing at"""
+
+    def act(self, observation: Observation) -> List[Decision]:
+        if not (observation.left_light_on or observation.right_light_on):
+            return [(Action.TOGGLE_LEFT_LIGHT, None), (Action.TOGGLE_RIGHT_LIGHT, None)]
+
+        actions: List[Decision] = []
+        if bool(observation.left_door_view) != observation.left_door_closed:
+            actions.append((Action.TOGGLE_LEFT_DOOR, None))
+        if bool(observation.right_door_view) != observation.right_door_closed:
+            actions.append((Action.TOGGLE_RIGHT_DOOR, None))
+        if observation.left_light_on:
+            actions.append((Action.TOGGLE_LEFT_LIGHT, None))
+        if observation.right_light_on:
+            actions.append((Action.TOGGLE_RIGHT_LIGHT, None))
+        return actions
+
+
+class SentryPolicy(LightCheckPolicy):
+    """Watches the room next to the doors on camera and only checks the lights after a sighting"""
+
+    def __init__(self, graph: LocationGraph = LOCATION_GRAPH):
+        doors = set(graph.doors)
+        approaches = [loc for loc in graph.cameras
+                      if any(nxt in doors for nxt in graph.successors(loc))]
+        self.watch = approaches[0] if approaches else graph.cameras[0]
+
+    def reset(self, rng: random.Random):
+        super().reset(rng)
+        self.alert = False
+
+    def act(self, observation: Observation) -> List[Decision]:
+        if observation.camera_open:
+            if observation.current_camera != self.watch.value:
+                return [(Action.SELECT_CAMERA, self.watch.value)]
+            if not observation.camera_view:
+                return []
+            # Someone is close: put the tablet down and go check the doors
+            self.alert = True
+            return [(Action.CLOSE_CAMERA, None)]
+
+        if self.alert or observation.left_door_closed or observation.right_door_closed:
+            actions = super().act(observation)
+            lights_off = not (observation.left_light_on or observation.right_light_on)
+            if not lights_off:
+                self.alert = False
+            return actions
+        return [(Action.OPEN_CAMERA, None)]
+
+
+def _search_policy() -> Policy:
+    from search import SearchPolicy  # search builds on this module
+    # A time budget would make results depend on machine load
+    return SearchPolicy(iterations=SEARCH_ITERATIONS)
+
+
+POLICIES: Dict[str, Callable[[], Policy]] = {
+    "idle": IdlePolicy,
+    "doors": DoorsShutPolicy,
+    "lights": LightCheckPolicy,
+    "sentry": SentryPolicy,
+    "search": _search_policy,
+}
+# Played when --policies is not given; search costs seconds per night, so it is opt-in
+DEFAULT_POLICIES = ("idle", "doors", "lights", "sentry")
+
+
+def make_policy(name: str) -> Policy:
+    """Instantiate a registered policy, or a module:Class path"""
+    if name in POLICIES:
+        return POLICIES[name]()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"unknown policy {name!r}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# ============= ARENA =============
+
+@dataclass
+class ArenaResult:
+    """Aggregate of one policy's nights"""
+    policy: str
+    nights: int = 0
+    wins: int = 0
+    hours_survived: float = 0.0
+    power_used: float = 0.0
+    final_power_on_wins: float = 0.0
+    decisions: int = 0
+    decision_ns: int = 0  # time spent observing and deciding
+    wall_ns: int = 0
+
+    def merge(self, other: "ArenaResult"):
+        self.nights += other.nights
+        self.wins += other.wins
+        self.hours_survived += other.hours_survived
+        self.power_used += other.power_used
+        self.final_power_on_wins += other.final_power_on_wins
+        self.decisions += other.decisions
+        self.decision_ns += other.decision_ns
+        self.wall_ns += other.wall_ns
+
+    @property
+    def survival_rate(self) -> float:
+        return self.wins / self.nights if self.nights else 0.0
+
+    @property
+    def power_per_hour(self) -> float:
+        """Power spent per game hour survived; lower is more efficient"""
+        return self.power_used / self.hours_survived if self.hours_survived else 0.0
+
+    @property
+    def mean_final_power(self) -> float:
+        """Power left at 6 AM, averaged over survived nights"""
+        return self.final_power_on_wins / self.wins if self.wins else 0.0
+
+    @property
+    def decisions_per_second(self) -> float:
+        """Decisions per second of worker time, simulation included"""
+        return self.decisions / (self.wall_ns / 1e9) if self.wall_ns else 0.0
+
+    @property
+    def decision_latency_us(self) -> float:
+        return self.decision_ns / self.decisions / 1000 if self.decisions else 0.0
+
+
+def night_seed(master_seed: int, night: int) -> str:
+    # String seeds hash stably across processes; every policy gets the same nights
+    return f"{master_seed}/{night}"
+
+
+def play_night(policy: Policy, sim: NightSimulation, result: ArenaResult,
+               dt: float = ARENA_DT, decision_interval: float = DECISION_INTERVAL):
+    """Play one reset night to the end, adding its statistics to result"""
+    clock = time.perf_counter_ns
+    next_decision = 0.0
+    decisions = 0
+    decision_ns = 0
+    while sim.outcome is None:
+        if sim.time_elapsed >= next_decision:
+            start = clock()
+            for action, arg in policy.act(sim.observe()):
+                sim.apply(action, arg)
+            decision_ns += clock() - start
+            decisions += 1
+            next_decision += decision_interval
+        sim.step(dt)
+
+    result.nights += 1
+    result.hours_survived += min(sim.time_elapsed / NIGHT_LENGTH * 6, 6.0)
+    result.power_used += STARTING_POWER - max(sim.power, 0.0)
+    if sim.outcome == GameState.WIN:
+        result.wins += 1
+        result.final_power_on_wins += sim.power
+    result.decisions += decisions
+    result.decision_ns += decision_ns
+
+
+Task = Tuple[str, int, int, int, float, Optional[str]]
+
+
+def run_task(task: Task) -> ArenaResult:
+    """Play a contiguous block of nights for one policy"""
+    policy_name, master_seed, first, count, decision_interval, difficulty = task
+    policy = make_policy(policy_name)
+    model = load_difficulty_model(difficulty) if difficulty else None
+    result = ArenaResult(policy_name)
+    start = time.perf_counter_ns()
+    for night in range(first, first + count):
+        seed = night_seed(master_seed, night)
+        sim = NightSimulation(rng=random.Random(seed), difficulty=model)
+        policy.reset(random.Random(f"{seed}/{policy_name}"))
+        policy.bind(sim)
+        play_night(policy, sim, result, decision_interval=decision_interval)
+    result.wall_ns = time.perf_counter_ns() - start
+    return result
+
+
+def run_arena(policies: List[str], nights: int, master_seed: int = 0, workers: int = 1,
+              decision_interval: float = DECISION_INTERVAL,
+              difficulty: Optional[str] = None, chunk: int = 50) -> List[ArenaResult]:
+    """Play nights for every policy across a process pool and merge per policy"""
+    tasks = [(name, master_seed, first, min(chunk, nights - first), decision_interval, difficulty)
+             for name in policies
+             for first in range(0, nights, chunk)]
+    if workers <= 1:
+        partials = [run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(run_task, tasks))
+
+    merged = {name: ArenaResult(name) for name in policies}
+    for partial in partials:
+        merged[partial.policy].merge(partial)
+    return list(merged.values())
+
+
+def print_results(results: List[ArenaResult], out=sys.stdout):
+    print(f"{'policy':<12} {'nights':>7} {'survival':>9} {'power/hour':>11} "
+          f"{'power@6AM':>10} {'decisions/s':>12} {'latency us':>11}", file=out)
+    for r in results:
+        print(f"{r.policy:<12} {r.nights:>7} {r.survival_rate:>9.1%} {r.power_per_hour:>11.2f} "
+              f"{r.mean_final_power:>10.1f} {r.decisions_per_second:>12.0f} "
+              f"{r.decision_latency_us:>11.2f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play automated policies against headless nights")
+    parser.add_argument("--policies", default=",".join(DEFAULT_POLICIES),
+                        help=f"comma-separated policies ({', '.join(POLICIES)}) or module:Class")
+    parser.add_argument("--nights", type=int, default=200, help="nights per policy")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--decision-interval", type=float, default=DECISION_INTERVAL,
+                        help="seconds of night time between decisions")
+    parser.add_argument("--difficulty", metavar="PATH", help="JSON or TOML balance definition")
+    args = parser.parse_args(argv)
+
+    policies = args.policies.split(",")
+    for name in policies:
+        try:
+            make_policy(name)
+        except (ValueError, ImportError, AttributeError) as exc:
+            parser.error(f"cannot load policy {name!r}: {exc}")
+
+    start = time.perf_counter()
+    results = run_arena(policies, args.nights, args.seed, args.workers,
+                        args.decision_interval, args.difficulty)
+    print_results(results)
+    print(f"{args.nights * len(policies)} nights in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
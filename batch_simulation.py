@@ -0,0 +1,249 @@
+"""
+Vectorized Monte Carlo engine for simulating thousands of nights at once.
+Holds every night as rows of NumPy structured arrays and advances them in
+lockstep, mirroring the scalar rules of class_function.NightSimulation and
+sampling moves from the same compiled LocationGraph and reading chances
+from the same DifficultyModel tables.
+Requires NumPy.
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Sequence
+
+import numpy as np
+
+from class_function import (
+    Animatronic, LocationGraph, LOCATION_GRAPH, create_animatronics,
+    DifficultyModel, DEFAULT_DIFFICULTY,
+    NIGHT_LENGTH, STARTING_POWER, BASE_DRAIN, DOOR_DRAIN, LIGHT_DRAIN, CAMERA_DRAIN,
+    RETREAT_CHANCE, FINAL_HOUR,
+)
+
+# Outcome codes stored per night
+RUNNING = 0
+WON = 1
+LOST = 2
+
+# Per-night state: power, office controls and how the night ended
+NIGHT_DTYPE = np.dtype([
+    ("power", np.float64),
+    ("left_door_closed", np.bool_),
+    ("right_door_closed", np.bool_),
+    ("left_light_on", np.bool_),
+    ("right_light_on", np.bool_),
+    ("camera_open", np.bool_),
+    ("outcome", np.int8),
+    ("death_hour", np.int8),
+    ("killer", np.int8),
+])
+
+# Per-animatronic state, one row per night and one column per animatronic
+ANIMATRONIC_DTYPE = np.dtype([
+    ("location", np.int16),
+    ("move_timer", np.float64),
+    ("ai_level", np.int8),
+    ("active", np.bool_),
+])
+
+
+@dataclass
+class BatchResult:
+    """Aggregate outcome of a batch of simulated nights"""
+    nights: int
+    wins: int
+    death_hours: np.ndarray  # deaths per game hour 0-6
+    kills: Dict[str, int]  # deaths credited to each animatronic, power-outs included
+    power_outs: int
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.nights if self.nights else 0.0
+
+
+class GraphArrays:
+    """NumPy view of a compiled LocationGraph for vectorized successor sampling"""
+
+    def __init__(self, graph: LocationGraph):
+        self.offsets = np.array(graph.offsets, dtype=np.intp)
+        self.degree = np.diff(self.offsets)
+        self.targets = np.array(graph.targets, dtype=np.int16)
+        self.alias_prob = np.array(graph.alias_prob, dtype=np.float64)
+        self.alias_index = np.array(graph.alias_index, dtype=np.intp)
+        self.retreat = np.array([graph.retreat.get(loc, loc).value for loc in graph.locations],
+                                dtype=np.int16)
+        self.left_door = graph.left_door.value
+        self.right_door = graph.right_door.value
+
+    def sample_next(self, location: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Alias-table draw of one weighted successor per entry of location"""
+        count = location.size
+        start = self.offsets[location]
+        edge = start + (rng.random(count) * self.degree[location]).astype(np.intp)
+        use_alias = rng.random(count) >= self.alias_prob[edge]
+        edge = np.where(use_alias, start + self.alias_index[edge], edge)
+        return self.targets[edge]
+
+
+def build_chance_tables(names: Sequence[str],
+                        difficulty: DifficultyModel = DEFAULT_DIFFICULTY) -> tuple:
+    """Stack each animatronic's move and attack tables, indexed by (column, ai_level, hour)"""
+    tables = [difficulty.tables_for(name) for name in names]
+    move = np.array([m for m, _ in tables], dtype=np.float64)
+    attack = np.array([a for _, a in tables], dtype=np.float64)
+    return move, attack
+
+
+class BatchNightSimulation:
+    """Advances N independent nights in lockstep with vectorized RNG draws"""
+
+    def __init__(self, n_nights: int, animatronics: Optional[List[Animatronic]] = None,
+                 ai_levels: Optional[np.ndarray] = None, seed: Optional[int] = None,
+                 graph: LocationGraph = LOCATION_GRAPH,
+                 difficulty: DifficultyModel = DEFAULT_DIFFICULTY):
+        roster = animatronics if animatronics is not None else create_animatronics(graph)
+        self.names = [a.name for a in roster]
+        self.rng = np.random.default_rng(seed)
+        self.graph = GraphArrays(graph)
+        self.max_ai_level = difficulty.max_ai_level
+        self.final_hour = difficulty.final_hour
+        self.move_chance, self.attack_chance = build_chance_tables(self.names, difficulty)
+
+        self.nights = np.zeros(n_nights, dtype=NIGHT_DTYPE)
+        self.nights["power"] = STARTING_POWER
+        self.nights["death_hour"] = -1
+        self.nights["killer"] = -1
+
+        self.anims = np.zeros((n_nights, len(roster)), dtype=ANIMATRONIC_DTYPE)
+        self.anims["location"] = [a.location.value for a in roster]
+        self.anims["move_timer"] = [a.move_timer for a in roster]
+        self.anims["ai_level"] = [a.ai_level for a in roster]
+        self.anims["active"] = [a.active for a in roster]
+        if ai_levels is not None:
+            # Broadcasts a per-animatronic row or a full (nights, animatronics) grid
+            self.anims["ai_level"] = np.clip(ai_levels, 0, self.max_ai_level)
+
+        self.time_elapsed = 0.0
+        self.game_hour = 0
+
+    def set_controls(self, left_door_closed: bool = False, right_door_closed: bool = False,
+                     left_light_on: bool = False, right_light_on: bool = False,
+                     camera_open: bool = False):
+        """Set office controls for every night (scalars or per-night arrays)"""
+        self.nights["left_door_closed"] = left_door_closed
+        self.nights["right_door_closed"] = right_door_closed
+        self.nights["left_light_on"] = left_light_on
+        self.nights["right_light_on"] = right_light_on
+        self.nights["camera_open"] = camera_open
+
+    @property
+    def running(self) -> np.ndarray:
+        return self.nights["outcome"] == RUNNING
+
+    def step(self, dt: float):
+        """Advance every unfinished night by one tick"""
+        nights = self.nights
+        running = nights["outcome"] == RUNNING
+        if not running.any():
+            return
+
+        self.time_elapsed += dt
+        self.game_hour = int((self.time_elapsed / NIGHT_LENGTH) * 6)
+        hour = min(self.game_hour, self.final_hour)
+
+        # Power drain
+        drain = (BASE_DRAIN
+                 + DOOR_DRAIN * (nights["left_door_closed"].astype(np.float64)
+                                 + nights["right_door_closed"])
+                 + LIGHT_DRAIN * (nights["left_light_on"].astype(np.float64)
+                                  + nights["right_light_on"])
+                 + CAMERA_DRAIN * nights["camera_open"])
+        power = np.where(running, np.maximum(nights["power"] - drain * dt, 0.0), nights["power"])
+        nights["power"] = power
+
+        killer = np.full(len(nights), -1, dtype=np.int8)
+
+        # Only animatronics whose move timer expired this tick draw random numbers
+        anims = self.anims
+        ticking = running[:, None] & anims["active"]
+        timers = anims["move_timer"]
+        timers[ticking] -= dt
+        rows, cols = np.nonzero(ticking & (timers <= 0))
+        if rows.size:
+            self._resolve_opportunities(rows, cols, hour, killer)
+
+        # Power out overrides any attack, just like check_power_out runs last
+        power_out = running & (power <= 0)
+        killer[power_out] = 0
+
+        lost = running & (killer >= 0)
+        nights["killer"][lost] = killer[lost]
+        nights["death_hour"][lost] = hour
+        nights["outcome"][lost] = LOST
+        if self.game_hour >= FINAL_HOUR:
+            nights["outcome"][running & ~lost] = WON
+
+    def _resolve_opportunities(self, rows: np.ndarray, cols: np.ndarray, hour: int,
+                               killer: np.ndarray):
+        """Roll movement, retreat and attack for each expired (night, animatronic) pair"""
+        anims = self.anims
+        rng = self.rng
+        count = rows.size
+        ai = anims["ai_level"][rows, cols]
+
+        moved = rng.random(count) < self.move_chance[cols, ai, hour]
+        anims["move_timer"][rows, cols] = np.where(
+            moved, rng.uniform(3.0, 8.0, count), rng.uniform(2.0, 5.0, count))
+        if not moved.any():
+            return
+
+        rows, cols, ai = rows[moved], cols[moved], ai[moved]
+        count = rows.size
+        location = anims["location"][rows, cols]
+
+        graph = self.graph
+        left_closed = self.nights["left_door_closed"][rows]
+        right_closed = self.nights["right_door_closed"][rows]
+        at_left = location == graph.left_door
+        at_right = location == graph.right_door
+        blocked = (at_left & left_closed) | (at_right & right_closed)
+
+        retreat = blocked & (rng.random(count) < RETREAT_CHANCE)
+        new_location = np.where(retreat, graph.retreat[location], graph.sample_next(location, rng))
+        anims["location"][rows, cols] = new_location
+
+        # Animatronics that were at an open door attack
+        at_open_door = (at_left & ~left_closed) | (at_right & ~right_closed)
+        attacks = at_open_door & (rng.random(count) < self.attack_chance[cols, ai, hour])
+        # Later animatronics overwrite earlier ones, matching the scalar loop order
+        order = np.argsort(cols[attacks], kind="stable")
+        killer[rows[attacks][order]] = cols[attacks][order]
+
+    def run(self, dt: float = 1 / 60) -> BatchResult:
+        """Step until every night has finished and summarize the batch"""
+        while self.running.any():
+            self.step(dt)
+        return self.result()
+
+    def result(self) -> BatchResult:
+        """Summarize finished nights"""
+        nights = self.nights
+        lost = nights["outcome"] == LOST
+        kill_counts = np.bincount(nights["killer"][lost], minlength=len(self.names))
+        return BatchResult(
+            nights=len(nights),
+            wins=int(np.count_nonzero(nights["outcome"] == WON)),
+            death_hours=np.bincount(nights["death_hour"][lost], minlength=FINAL_HOUR + 1),
+            kills={name: int(n) for name, n in zip(self.names, kill_counts)},
+            power_outs=int(np.count_nonzero(lost & (nights["power"] <= 0))),
+        )
+
+
+def simulate_nights(n_nights: int, animatronics: Optional[List[Animatronic]] = None,
+                    ai_levels: Optional[Sequence[int]] = None, seed: Optional[int] = None,
+                    dt: float = 1 / 60, graph: LocationGraph = LOCATION_GRAPH,
+                    difficulty: DifficultyModel = DEFAULT_DIFFICULTY,
+                    **controls) -> BatchResult:
+    """Simulate n_nights with fixed office controls and return aggregate statistics"""
+    batch = BatchNightSimulation(n_nights, animatronics, ai_levels, seed, graph, difficulty)
+    batch.set_controls(**controls)
+    return batch.run(dt)
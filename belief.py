@@ -0,0 +1,109 @@
+"""
+The player's belief about where the animatronics are, for fair hints.
+
+Only what the player has seen goes in: where and when each animatronic was
+last on camera or under a door light. search.py determinizes every hint
+rollout from it, so hints never use positions kept from the player. The
+module needs nothing beyond the simulation, so the game can keep a belief
+up to date all night without loading the search.
+"""
+
+import random
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+from class_function import Location, NightSimulation, Observation
+
+MOVE_INTERVAL = 4.0  # mean night seconds between an animatronic's movement rolls
+MAX_MOVE_TIMER = 8.0  # longest movement timer an animatronic can draw
+MAX_ROLLS = 60  # movement rolls followed for an animatronic long out of sight
+
+
+# ============= BELIEF =============
+
+class Belief:
+    """What the player can know about where the animatronics are.
+
+    Remembers where and when each animatronic was last seen, on camera or
+    under a door light. prepare() turns that into a distribution per
+    animatronic: one movement roll per MOVE_INTERVAL seconds since the
+    sighting, each moving it along the map's weighted edges with its move
+    chance, with every location the player is looking at ruled out.
+    determinize() then rewrites a restored night into a sample from it:
+    animatronics in sight stay where they are seen and movement timers,
+    hidden too, are drawn afresh.
+    """
+
+    def __init__(self, sim: NightSimulation):
+        self.graph = sim.graph
+        # Every night starts with the whole roster on the start node
+        self.last_seen: Dict[str, Location] = {anim.name: sim.graph.start for anim in sim.animatronics}
+        self.seen_at: Dict[str, float] = {anim.name: 0.0 for anim in sim.animatronics}
+        self.watched: Dict[Location, Tuple[str, ...]] = {}  # locations in view -> who is there
+        self._odds: Dict[str, Tuple[List[Location], List[float]]] = {}
+
+    def copy(self) -> "Belief":
+        """An independent belief that later observations of this one leave alone"""
+        frozen = Belief.__new__(Belief)
+        frozen.graph = self.graph
+        frozen.last_seen = dict(self.last_seen)
+        frozen.seen_at = dict(self.seen_at)
+        frozen.watched = dict(self.watched)
+        frozen._odds = dict(self._odds)
+        return frozen
+
+    def observe(self, observation: Observation):
+        """Take in what the player sees right now"""
+        graph = self.graph
+        watched: Dict[Location, Tuple[str, ...]] = {}
+        if observation.camera_open:
+            watched[graph.locations[observation.current_camera]] = observation.camera_view
+        if observation.left_light_on:
+            watched[graph.left_door] = observation.left_door_view
+        if observation.right_light_on:
+            watched[graph.right_door] = observation.right_door_view
+        for location, names in watched.items():
+            for name in names:
+                self.last_seen[name] = location
+                self.seen_at[name] = observation.time_elapsed
+        self.watched = watched
+
+    def prepare(self, sim: NightSimulation):
+        """Work out where each animatronic out of sight may be by now"""
+        graph = self.graph
+        size = len(graph)
+        visible = {name for names in self.watched.values() for name in names}
+        self._odds = {}
+        for anim in sim.animatronics:
+            if anim.name in visible:
+                continue
+            rolls = min(int((sim.time_elapsed - self.seen_at[anim.name]) / MOVE_INTERVAL), MAX_ROLLS)
+            chance = sim.difficulty.move_chance(anim, sim.game_hour)
+            odds = [0.0] * size
+            odds[self.last_seen[anim.name].value] = 1.0
+            for _ in range(rolls):
+                moved = [p * (1.0 - chance) for p in odds]
+                for i, p in enumerate(odds):
+                    if p:
+                        first, last = graph.offsets[i], graph.offsets[i + 1]
+                        total = sum(graph.weights[first:last])
+                        for k in range(first, last):
+                            moved[graph.targets[k]] += p * chance * graph.weights[k] / total
+                odds = moved
+            for location in self.watched:
+                odds[location.value] = 0.0
+            if not any(odds):
+                # Not where it should be: anywhere out of sight will do
+                odds = [0.0 if loc in self.watched else 1.0 for loc in graph.locations]
+            self._odds[anim.name] = (list(graph.locations), list(accumulate(odds)))
+
+    def determinize(self, sim: NightSimulation, rng: random.Random):
+        """Replace the hidden part of a restored night with a sample from the belief"""
+        visible = {name: location for location, names in self.watched.items() for name in names}
+        for anim in sim.animatronics:
+            location = visible.get(anim.name)
+            if location is None:
+                locations, cumulative = self._odds[anim.name]
+                location = rng.choices(locations, cum_weights=cumulative)[0]
+            anim.move_to(location)
+            anim.move_timer = rng.uniform(0.0, MAX_MOVE_TIMER)
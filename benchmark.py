@@ -0,0 +1,231 @@
+"""
+Reproducible performance benchmarks with JSON baselines.
+
+Measures headless nights per second, update_animatronics ticks per second
+as the roster grows, and per-screen draw time on SDL's offscreen dummy
+video driver. Every workload is seeded, and each metric is the best of
+several repeats to damp scheduler noise.
+
+Usage:
+    python benchmark.py run --output baseline.json
+    python benchmark.py run --output current.json
+    python benchmark.py compare baseline.json current.json --threshold 0.10
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from class_function import Animatronic, NightSimulation, create_animatronics
+
+SEED = 1234
+REPEATS = 7
+ROSTER_SIZES = (3, 12, 48, 192)
+DEFAULT_THRESHOLD = 0.10  # relative slowdown that counts as a regression
+
+Metric = Dict[str, object]
+
+
+def best_rate(work: Callable[[], int], repeats: int) -> float:
+    """Highest units-per-second over repeats; work() returns units done"""
+    best = 0.0
+    # Like timeit, keep collector pauses out of the measurement
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            units = work()
+            elapsed = time.perf_counter() - start
+            best = max(best, units / elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def metric(value: float, unit: str, higher_is_better: bool) -> Metric:
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+# ============= SIMULATION =============
+
+def bench_nights(nights: int, repeats: int) -> Dict[str, Metric]:
+    """Whole headless nights per second on both schedulers"""
+    def fixed() -> int:
+        sim = NightSimulation(rng=random.Random(SEED))
+        for _ in range(nights):
+            sim.reset()
+            sim.run()
+        return nights
+
+    def events() -> int:
+        sim = NightSimulation(rng=random.Random(SEED))
+        for _ in range(nights * 10):
+            sim.reset()
+            sim.run_events()
+        return nights * 10
+
+    return {
+        "sim.nights_per_second.fixed": metric(best_rate(fixed, repeats), "nights/s", True),
+        "sim.nights_per_second.events": metric(best_rate(events, repeats), "nights/s", True),
+    }
+
+
+def scaled_roster(size: int) -> List[Animatronic]:
+    """size animatronics cloned round-robin from the default roster"""
+    templates = create_animatronics()
+    roster = []
+    for i in range(size):
+        template = templates[i % len(templates)]
+        roster.append(Animatronic(f"{template.name}{i}", template.location,
+                                  template.ai_level, template.move_timer))
+    return roster
+
+
+def bench_roster_scaling(ticks: int, repeats: int) -> Dict[str, Metric]:
+    """update_animatronics ticks per second for growing rosters"""
+    results = {}
+    for size in ROSTER_SIZES:
+        def work() -> int:
+            sim = NightSimulation(scaled_roster(size), rng=random.Random(SEED))
+            # Doors shut so attacks never end the night mid-measurement
+            sim.left_door_closed = sim.right_door_closed = True
+            update = sim.update_animatronics
+            for _ in range(ticks):
+                update(1 / 60)
+            return ticks
+        results[f"sim.update_animatronics.roster_{size}"] = metric(
+            best_rate(work, repeats), "ticks/s", True)
+    return results
+
+
+# ============= RENDERING =============
+
+def bench_render(frames: int, repeats: int) -> Dict[str, Metric]:
+    """Milliseconds per call of each draw method, offscreen"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import maingame
+    from class_function import GameState
+
+    random.seed(SEED)
+    game = maingame.Game()
+    game.camera_effects._rng.seed(SEED)
+    game.start_night()
+    screens = {
+        "draw_menu": (GameState.MENU, game.draw_menu),
+        "draw_office": (GameState.PLAYING, game.draw_office),
+        "draw_camera": (GameState.CAMERA, game.draw_camera),
+        "draw_hud": (GameState.PLAYING, game.draw_hud),
+    }
+    results = {}
+    for name, (state, draw) in screens.items():
+        game.state = state
+        draw()  # build cached layers outside the timed loop
+
+        def work() -> int:
+            for _ in range(frames):
+                draw()
+            return frames
+        results[f"render.{name}"] = metric(1000 / best_rate(work, repeats), "ms", False)
+    return results
+
+
+# ============= BASELINES =============
+
+def run_benchmarks(quick: bool = False, render: bool = True) -> Dict[str, object]:
+    """Run every benchmark and return a baseline document"""
+    repeats = 2 if quick else REPEATS
+    scale = 0.2 if quick else 1.0
+    results: Dict[str, Metric] = {}
+    results.update(bench_nights(max(1, int(10 * scale)), repeats))
+    results.update(bench_roster_scaling(max(1, int(2000 * scale)), repeats))
+    if render:
+        results.update(bench_render(max(1, int(400 * scale)), repeats))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, object]]:
+    """Per-metric change from baseline; 'regressed' marks slowdowns past threshold"""
+    rows = []
+    old_results = baseline["results"]
+    for name, new in current["results"].items():
+        old = old_results.get(name)
+        if old is None:
+            continue
+        # Normalize so that a positive change always means faster
+        if new["higher_is_better"]:
+            change = new["value"] / old["value"] - 1
+        else:
+            change = old["value"] / new["value"] - 1
+        rows.append({"metric": name, "unit": new["unit"], "baseline": old["value"],
+                     "current": new["value"], "change": change,
+                     "regressed": change < -threshold})
+    return rows
+
+
+def print_results(document: Dict[str, object], out=sys.stdout):
+    for name, result in document["results"].items():
+        print(f"{name:<42} {result['value']:>12.3f} {result['unit']}", file=out)
+
+
+def print_comparison(rows: List[Dict[str, object]], out=sys.stdout):
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else ""
+        print(f"{row['metric']:<42} {row['baseline']:>12.3f} -> {row['current']:>12.3f} "
+              f"{row['unit']:<9} {row['change']:+7.1%} {flag}", file=out)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Simulation and render benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="write results as a JSON baseline")
+    run_parser.add_argument("--quick", action="store_true", help="smaller workloads, fewer repeats")
+    run_parser.add_argument("--no-render", action="store_true", help="skip render benchmarks")
+
+    compare_parser = commands.add_parser("compare", help="compare two baselines")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="relative slowdown flagged as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        document = run_benchmarks(quick=args.quick, render=not args.no_render)
+        print_results(document)
+        if args.output:
+            with open(args.output, "w") as out:
+                json.dump(document, out, indent=2)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows)
+    if any(row["regressed"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
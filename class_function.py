@@ -3,10 +3,38 @@ Helper module containing classes and utility functions for the FNAF-like game.
 Keeps data structures and utility functions separate from main game logic.
 """
 
+import heapq
+import json
+import os
 import random
+from array import array
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import count
+from typing import List, Dict, Tuple, Optional, Callable, Iterable, Iterator
+
+
+# ============= SIMULATION CONSTANTS =============
+
+NIGHT_LENGTH = 120  # 2 minuter per match
+STARTING_POWER = 100.0
+
+# Power drain per second for each consumer
+BASE_DRAIN = 0.1
+DOOR_DRAIN = 0.4
+LIGHT_DRAIN = 0.2
+CAMERA_DRAIN = 0.1
+
+RETREAT_CHANCE = 0.3  # chance a blocked animatronic falls back to the hallway
+
+MAX_AI_LEVEL = 20
+FINAL_HOUR = 6  # 6 AM ends the night
+
+# Event kinds for the next-event scheduler
+EVENT_MOVE = 0
+EVENT_HOUR = 1
+EVENT_POWER_OUT = 2
 
 
 class GameState(Enum):
@@ -18,16 +46,158 @@ class GameState(Enum):
     WIN = 5
 
 
-class Location(Enum):
-    """Enum for game locations"""
-    STAGE = 0
-    DINING = 1
-    HALLWAY = 2
-    LEFT_DOOR = 3
-    RIGHT_DOOR = 4
+class Action(Enum):
+    """Player actions a NightSimulation accepts; SELECT_CAMERA takes a location index"""
+    TOGGLE_LEFT_DOOR = 1
+    TOGGLE_RIGHT_DOOR = 2
+    TOGGLE_LEFT_LIGHT = 3
+    TOGGLE_RIGHT_LIGHT = 4
+    OPEN_CAMERA = 5
+    CLOSE_CAMERA = 6
+    SELECT_CAMERA = 7
+
+
+@dataclass(frozen=True, slots=True)
+class Observation:
+    """What the player can see: office state, plus whoever a light or the camera shows"""
+    time_elapsed: float
+    power: float
+    game_hour: int
+    left_door_closed: bool
+    right_door_closed: bool
+    left_light_on: bool
+    right_light_on: bool
+    camera_open: bool
+    current_camera: int  # location index
+    camera_view: Tuple[str, ...]  # names on the current camera, empty while it is closed
+    left_door_view: Tuple[str, ...]  # names at the left door, empty while its light is off
+    right_door_view: Tuple[str, ...]
+
+
+# ============= LOCATION GRAPH =============
+
+def _build_alias_table(weights: List[float]) -> Tuple[List[float], List[int]]:
+    """Vose alias table for O(1) weighted sampling among len(weights) choices"""
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        low = small.pop()
+        high = large.pop()
+        prob[low] = scaled[low]
+        alias[low] = high
+        scaled[high] += scaled[low] - 1.0
+        (small if scaled[high] < 1.0 else large).append(high)
+    return prob, alias
+
+
+class LocationGraph:
+    """Map definition compiled into an integer-indexed, weighted adjacency array.
+
+    Nodes become members of a generated Enum whose values are their indices.
+    Outgoing edges are stored CSR-style (offsets/targets/weights) with a
+    per-node alias table, so sample_next picks a weighted successor in O(1).
+    """
+
+    def __init__(self, data: dict, enum_name: str = "Location"):
+        nodes = data["nodes"]
+        ids = [node["id"] for node in nodes]
+        if len(set(ids)) != len(ids):
+            raise ValueError("map has duplicate node ids")
+        index = {node_id: i for i, node_id in enumerate(ids)}
+
+        self.name = data.get("name", enum_name)
+        self.location_enum = Enum(enum_name, [(node_id, i) for i, node_id in enumerate(ids)],
+                                  module=__name__)
+        self.locations = tuple(self.location_enum)
+        self.names = tuple(node.get("name", node["id"]) for node in nodes)
+        self.camera_names = tuple(node.get("camera", node["id"]) for node in nodes)
+        self.camera_labels = tuple(node.get("button", node.get("camera", node["id"])) for node in nodes)
+        self.cameras = tuple(loc for loc, node in zip(self.locations, nodes)
+                             if node.get("camera", True) is not False)
 
+        starts = [loc for loc, node in zip(self.locations, nodes) if node.get("start")]
+        self.start = starts[0] if starts else self.locations[0]
 
-@dataclass
+        doors = {node["door"]: loc for loc, node in zip(self.locations, nodes) if "door" in node}
+        if "left" not in doors or "right" not in doors:
+            raise ValueError("map needs one node with door 'left' and one with door 'right'")
+        self.left_door = doors["left"]
+        self.right_door = doors["right"]
+        self.doors = frozenset(doors.values())
+        self.retreat = {loc: self.locations[index[node["retreat"]]]
+                        for loc, node in zip(self.locations, nodes) if "retreat" in node}
+
+        outgoing: List[List[Tuple[int, float]]] = [[] for _ in nodes]
+        for edge in data["edges"]:
+            weight = float(edge.get("weight", 1.0))
+            if weight <= 0:
+                raise ValueError(f"edge {edge['from']} -> {edge['to']} needs a positive weight")
+            outgoing[index[edge["from"]]].append((index[edge["to"]], weight))
+
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        self.weights = array("d")
+        self.alias_prob = array("d")
+        self.alias_index = array("i")
+        for node_id, edges in zip(ids, outgoing):
+            if not edges:
+                raise ValueError(f"node {node_id} has no outgoing edges")
+            prob, alias = _build_alias_table([w for _, w in edges])
+            self.targets.extend(t for t, _ in edges)
+            self.weights.extend(w for _, w in edges)
+            self.alias_prob.extend(prob)
+            self.alias_index.extend(alias)
+            self.offsets.append(len(self.targets))
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def successors(self, location) -> list:
+        """Locations reachable in one move, in map order"""
+        i = location.value
+        return [self.locations[t] for t in self.targets[self.offsets[i]:self.offsets[i + 1]]]
+
+    def sample_next(self, location, rng=random):
+        """Weighted random successor of a location via its alias table"""
+        i = location.value
+        start = self.offsets[i]
+        degree = self.offsets[i + 1] - start
+        if degree == 1:
+            return self.locations[self.targets[start]]
+        k = int(rng.random() * degree)
+        if rng.random() >= self.alias_prob[start + k]:
+            k = self.alias_index[start + k]
+        return self.locations[self.targets[start + k]]
+
+
+def _load_definition(path: str) -> dict:
+    """Read a JSON or TOML data file"""
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_location_graph(path: str, enum_name: str = "Location") -> LocationGraph:
+    """Load and compile a JSON or TOML map definition"""
+    return LocationGraph(_load_definition(path), enum_name)
+
+
+DEFAULT_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps", "default.json")
+
+# The default map is compiled once at import and defines the Location enum
+LOCATION_GRAPH = load_location_graph(DEFAULT_MAP_PATH)
+Location = LOCATION_GRAPH.location_enum
+
+
+@dataclass(slots=True)
 class Animatronic:
     """Dataclass representing an animatronic character"""
     name: str
@@ -35,70 +205,150 @@ class Animatronic:
     ai_level: int
     move_timer: float
     active: bool = True
+    roster: Optional["Roster"] = field(default=None, repr=False, compare=False)
     
-    def update(self, dt: float, game_hour: int) -> bool:
-        """Update animatronic, returns True if moved"""
+    def update(self, dt: float, game_hour: int, rng=random,
+               move_chance: Optional[float] = None) -> bool:
+        """Update animatronic, returns True if moved.
+
+        rng is any object with random()/uniform()/choice(), such as a
+        random.Random; it defaults to the global random module. move_chance
+        is the looked-up probability of moving once the timer expires,
+        calculate_difficulty() when not given.
+        """
         if not self.active:
             return False
             
-        self.move_timer -= dt
+        # Most ticks only count the timer down, so keep that path to one store
+        timer = self.move_timer - dt
+        if timer > 0:
+            self.move_timer = timer
+            return False
         
-        if self.move_timer <= 0:
-            # Movement chance increases with AI level and game hour
-            difficulty = (self.ai_level + game_hour) / 20.0
-            if random.random() < difficulty:
-                self.move_timer = random.uniform(3.0, 8.0)
-                return True
-            self.move_timer = random.uniform(2.0, 5.0)
+        # Movement chance increases with AI level and game hour
+        if move_chance is None:
+            move_chance = calculate_difficulty(self.ai_level, game_hour)
+        if rng.random() < move_chance:
+            self.move_timer = rng.uniform(3.0, 8.0)
+            return True
+        self.move_timer = rng.uniform(2.0, 5.0)
         return False
     
-    def move(self, door_blocked: bool = False, dt: float = 0):
-        """Move animatronic to next location, respecting door blocks"""
-        path = {
-            Location.STAGE: [Location.DINING],
-            Location.DINING: [Location.HALLWAY],
-            Location.HALLWAY: [Location.LEFT_DOOR, Location.RIGHT_DOOR],
-            Location.LEFT_DOOR: [Location.LEFT_DOOR],
-            Location.RIGHT_DOOR: [Location.RIGHT_DOOR]
-        }
-        
+    def move(self, door_blocked: bool = False, dt: float = 0, rng=random,
+             graph: LocationGraph = LOCATION_GRAPH):
+        """Move animatronic to next location on the map, respecting door blocks"""
         # If at a door and it's blocked, sometimes try to retreat
-        if door_blocked and self.location in [Location.LEFT_DOOR, Location.RIGHT_DOOR]:
-            retreat_chance = 0.3
-            if random.random() < retreat_chance:
-                self.location = Location.HALLWAY
+        if door_blocked and self.location in graph.doors:
+            if rng.random() < RETREAT_CHANCE:
+                self.move_to(graph.retreat.get(self.location, self.location))
                 return
         
-        if self.location in path:
-            possible = path[self.location]
-            self.location = random.choice(possible)
+        self.move_to(graph.sample_next(self.location, rng))
+    
+    def move_to(self, location: Location):
+        """Place the animatronic at a location, keeping its roster's index current"""
+        old = self.location
+        if location == old:
+            return
+        self.location = location
+        if self.roster is not None:
+            self.roster.moved(self, old)
+
+
+MoveObserver = Callable[[Animatronic, Location, Location], None]
+
+
+class Roster:
+    """Animatronics indexed by location, kept current as they move.
+
+    Behaves like a read-only list of its members. Occupancy queries read a
+    Location -> members index that Animatronic.move_to updates incrementally,
+    so they never scan the whole roster. Observers are called with
+    (animatronic, old_location, new_location) after every move.
+    """
+
+    def __init__(self, animatronics: Iterable[Animatronic] = ()):
+        self._members: List[Animatronic] = []
+        self._order: Dict[int, int] = {}  # id(animatronic) -> roster position
+        self._by_location: Dict[Location, List[Animatronic]] = defaultdict(list)
+        self._observers: List[MoveObserver] = []
+        for anim in animatronics:
+            self.add(anim)
+
+    def add(self, anim: Animatronic):
+        """Add an animatronic and index it at its current location"""
+        anim.roster = self
+        self._order[id(anim)] = len(self._members)
+        self._members.append(anim)
+        self._by_location[anim.location].append(anim)
+
+    def moved(self, anim: Animatronic, old: Location):
+        """Re-index an animatronic after it left old; called by Animatronic.move_to"""
+        self._by_location[old].remove(anim)
+        # Keep each location's members in roster order, like a scan would
+        members = self._by_location[anim.location]
+        position = self._order[id(anim)]
+        index = len(members)
+        while index > 0 and self._order[id(members[index - 1])] > position:
+            index -= 1
+        members.insert(index, anim)
+
+        for observer in self._observers:
+            observer(anim, old, anim.location)
+
+    def at(self, location: Location) -> List[Animatronic]:
+        """Animatronics at a location, in roster order. The list is live; do not modify it"""
+        return self._by_location[location]
+
+    def names_at(self, location: Location) -> List[str]:
+        """Names of the animatronics at a location"""
+        return [a.name for a in self._by_location[location]]
+
+    def count_at(self, location: Location) -> int:
+        return len(self._by_location[location])
+
+    def occupied(self, location: Location) -> bool:
+        return bool(self._by_location[location])
+
+    def subscribe(self, observer: MoveObserver):
+        """Call observer(animatronic, old_location, new_location) after every move"""
+        self._observers.append(observer)
+
+    def unsubscribe(self, observer: MoveObserver):
+        self._observers.remove(observer)
+
+    def __iter__(self) -> Iterator[Animatronic]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __getitem__(self, index: int) -> Animatronic:
+        return self._members[index]
 
 
 # ============= UTILITY FUNCTIONS =============
 
-def get_location_name(location: Location) -> str:
+def get_location_name(location: Location, graph: LocationGraph = LOCATION_GRAPH) -> str:
     """Get human-readable name for a location"""
-    location_names = {
-        Location.STAGE: "Show Stage",
-        Location.DINING: "Dining Area",
-        Location.HALLWAY: "Hallway",
-        Location.LEFT_DOOR: "Left Door",
-        Location.RIGHT_DOOR: "Right Door"
-    }
-    return location_names.get(location, "Unknown")
+    if location in graph.locations:
+        return graph.names[location.value]
+    return "Unknown"
 
 
-def create_animatronics() -> List[Animatronic]:
+def create_animatronics(graph: LocationGraph = LOCATION_GRAPH) -> List[Animatronic]:
     """Factory function to create default animatronics for a new night"""
     return [
-        Animatronic("Freddy", Location.STAGE, 2, 5.0),
-        Animatronic("Bonnie", Location.STAGE, 3, 4.0),
-        Animatronic("Chica", Location.STAGE, 3, 4.5),
+        Animatronic("Freddy", graph.start, 2, 5.0),
+        Animatronic("Bonnie", graph.start, 3, 4.0),
+        Animatronic("Chica", graph.start, 3, 4.5),
     ]
 
 
 def get_animatronics_at_location(animatronics: List[Animatronic], location: Location) -> List[Animatronic]:
     """Get list of animatronics at a specific location"""
+    if isinstance(animatronics, Roster):
+        return list(animatronics.at(location))
     return [a for a in animatronics if a.location == location]
 
 
@@ -107,15 +357,9 @@ def get_animatronic_names_at_location(animatronics: List[Animatronic], location:
     return [a.name for a in get_animatronics_at_location(animatronics, location)]
 
 
-def get_movement_path() -> Dict[Location, List[Location]]:
+def get_movement_path(graph: LocationGraph = LOCATION_GRAPH) -> Dict[Location, List[Location]]:
     """Get the movement path graph for animatronics"""
-    return {
-        Location.STAGE: [Location.DINING],
-        Location.DINING: [Location.HALLWAY],
-        Location.HALLWAY: [Location.LEFT_DOOR, Location.RIGHT_DOOR],
-        Location.LEFT_DOOR: [Location.LEFT_DOOR],
-        Location.RIGHT_DOOR: [Location.RIGHT_DOOR]
-    }
+    return {location: graph.successors(location) for location in graph.locations}
 
 
 def format_game_time(game_hour: int) -> str:
@@ -127,3 +371,408 @@ def format_game_time(game_hour: int) -> str:
 def calculate_difficulty(ai_level: int, game_hour: int) -> float:
     """Calculate movement difficulty based on AI level and game progression"""
     return (ai_level + game_hour) / 20.0
+
+
+def calculate_attack_chance(ai_level: int, game_hour: int) -> float:
+    """Calculate the chance an animatronic at an open door attacks"""
+    return 0.8 + (ai_level * 0.05) + (game_hour * 0.05)
+
+
+# ============= DIFFICULTY MODEL =============
+
+Curve = Callable[[int, int], float]  # (ai_level, game_hour) -> probability
+
+
+class HourRamp:
+    """per_level per AI level plus a hand-tuned value for each hour.
+
+    A class rather than a closure so models built from it can be pickled
+    and sent to worker processes.
+    """
+
+    __slots__ = ("per_hour", "per_level")
+
+    def __init__(self, per_hour: List[float], per_level: float = 0.05):
+        self.per_hour = tuple(per_hour)
+        self.per_level = per_level
+
+    def __call__(self, ai_level: int, game_hour: int) -> float:
+        per_hour = self.per_hour
+        return ai_level * self.per_level + per_hour[min(game_hour, len(per_hour) - 1)]
+
+
+def hour_ramp(per_hour: List[float], per_level: float = 0.05) -> Curve:
+    """Curve of per_level per AI level plus a hand-tuned value for each hour"""
+    return HourRamp(per_hour, per_level)
+
+
+@dataclass(frozen=True)
+class DifficultyModifier:
+    """Per-animatronic adjustment applied when the tables are built"""
+    level_offset: int = 0
+    move_scale: float = 1.0
+    attack_scale: float = 1.0
+
+
+class DifficultyModel:
+    """Move and attack probabilities tabulated by (ai_level, game_hour).
+
+    Curves are evaluated once, when the model is built, and clamped to
+    [0, 1]; the simulators only index the tables. Animatronics named in
+    modifiers get their own tables. A model built by from_config keeps its
+    balance definition in config, so night logs can rebuild it.
+    """
+
+    def __init__(self, move_curve: Curve = calculate_difficulty,
+                 attack_curve: Curve = calculate_attack_chance,
+                 modifiers: Optional[Dict[str, DifficultyModifier]] = None,
+                 max_ai_level: int = MAX_AI_LEVEL, final_hour: int = FINAL_HOUR):
+        self.move_curve = move_curve
+        self.attack_curve = attack_curve
+        self.max_ai_level = max_ai_level
+        self.final_hour = final_hour
+        self.modifiers = dict(modifiers or {})
+        self.config: Optional[dict] = None
+
+        default = DifficultyModifier()
+        self.move, self.attack = self._tabulate(default)
+        self._tables: Dict[str, Tuple[List[List[float]], List[List[float]]]] = {
+            name: self._tabulate(modifier) for name, modifier in self.modifiers.items()}
+
+    def _tabulate(self, modifier: DifficultyModifier) -> Tuple[List[List[float]], List[List[float]]]:
+        move, attack = [], []
+        for ai_level in range(self.max_ai_level + 1):
+            level = min(max(ai_level + modifier.level_offset, 0), self.max_ai_level)
+            move.append([min(max(self.move_curve(level, hour) * modifier.move_scale, 0.0), 1.0)
+                         for hour in range(self.final_hour + 1)])
+            attack.append([min(max(self.attack_curve(level, hour) * modifier.attack_scale, 0.0), 1.0)
+                           for hour in range(self.final_hour + 1)])
+        return move, attack
+
+    def tables_for(self, name: str) -> Tuple[List[List[float]], List[List[float]]]:
+        """(move, attack) tables used for the named animatronic"""
+        return self._tables.get(name, (self.move, self.attack))
+
+    def move_chance(self, animatronic: Animatronic, game_hour: int) -> float:
+        move = self.tables_for(animatronic.name)[0]
+        return move[min(max(animatronic.ai_level, 0), self.max_ai_level)][min(game_hour, self.final_hour)]
+
+    def attack_chance(self, animatronic: Animatronic, game_hour: int) -> float:
+        attack = self.tables_for(animatronic.name)[1]
+        return attack[min(max(animatronic.ai_level, 0), self.max_ai_level)][min(game_hour, self.final_hour)]
+
+    @classmethod
+    def from_config(cls, data: dict) -> "DifficultyModel":
+        """Build a model from a balance definition.
+
+        Curves are {"per_level": float, "per_hour": [float, ...]} ramps; a
+        missing curve keeps the built-in formula. "modifiers" maps
+        animatronic names to DifficultyModifier fields.
+        """
+        curves = {}
+        for key in ("move", "attack"):
+            spec = data.get(key)
+            if spec is not None:
+                curves[f"{key}_curve"] = hour_ramp(spec["per_hour"], spec.get("per_level", 0.05))
+        modifiers = {name: DifficultyModifier(**fields)
+                     for name, fields in data.get("modifiers", {}).items()}
+        model = cls(modifiers=modifiers, max_ai_level=data.get("max_ai_level", MAX_AI_LEVEL),
+                    **curves)
+        model.config = data
+        return model
+
+
+def load_difficulty_model(path: str) -> DifficultyModel:
+    """Load a JSON or TOML balance definition"""
+    return DifficultyModel.from_config(_load_definition(path))
+
+
+# Built once at import; every simulator shares it unless given another
+DEFAULT_DIFFICULTY = DifficultyModel()
+
+
+# ============= SIMULATION =============
+
+class PowerModel:
+    """Closed-form power meter: linear drain between control toggles.
+
+    Power is anchored at the last toggle and evaluated analytically from
+    there, so nothing is integrated per frame and no rounding accumulates.
+    """
+
+    def __init__(self, power: float = STARTING_POWER, time: float = 0.0,
+                 drain_rate: float = BASE_DRAIN):
+        self.version = 0  # bumped on every re-anchor, lets schedulers spot stale predictions
+        self.rebase(time, power, drain_rate)
+
+    def rebase(self, time: float, power: float, drain_rate: float):
+        """Anchor the meter at (time, power) draining at drain_rate from then on"""
+        self.anchor_time = time
+        self.anchor_power = max(0.0, power)
+        self.drain_rate = drain_rate
+        self.power_out_time = time + self.anchor_power / drain_rate
+        self.version += 1
+
+    def power_at(self, time: float) -> float:
+        """Remaining power at the given night time"""
+        if time >= self.power_out_time:
+            return 0.0
+        return self.anchor_power - self.drain_rate * (time - self.anchor_time)
+
+    def set_drain_rate(self, time: float, drain_rate: float):
+        """Change the drain rate from the given time onwards"""
+        self.rebase(time, self.power_at(time), drain_rate)
+
+    def time_until_power_out(self, time: float) -> float:
+        """Seconds from the given time until power reaches zero"""
+        return max(0.0, self.power_out_time - time)
+
+
+def _control(name: str) -> property:
+    """Office control flag whose setter re-anchors the power model when it toggles"""
+    attr = "_" + name
+
+    def get(self) -> bool:
+        return getattr(self, attr)
+
+    def set(self, value: bool):
+        if value != getattr(self, attr):
+            setattr(self, attr, value)
+            self.power_model.set_drain_rate(self.time_elapsed, self.drain_rate())
+
+    return property(get, set)
+
+
+class NightSimulation:
+    """Renderer-free night engine owning power, time, office controls and animatronics.
+
+    Has no pygame dependency, so bots and balance runs can step nights headlessly.
+    All randomness comes from its own random.Random, so a seeded night is
+    reproducible. The outcome is None while the night is running, then
+    GameState.WIN or GameState.GAME_OVER.
+    """
+
+    def __init__(self, animatronics: Optional[List[Animatronic]] = None,
+                 rng: Optional[random.Random] = None, graph: LocationGraph = LOCATION_GRAPH,
+                 difficulty: Optional[DifficultyModel] = None):
+        self.rng = rng if rng is not None else random.Random()
+        self.graph = graph
+        self.difficulty = difficulty if difficulty is not None else DEFAULT_DIFFICULTY
+        self.reset(animatronics)
+
+    def reset(self, animatronics: Optional[List[Animatronic]] = None):
+        """Reset simulation state for a new night"""
+        self.time_elapsed = 0.0
+        self.game_hour = 0  # 0-6 (12AM to 6AM)
+
+        self._left_door_closed = False
+        self._right_door_closed = False
+        self._left_light_on = False
+        self._right_light_on = False
+        self._camera_open = False
+        self.power_model = PowerModel(STARTING_POWER, self.time_elapsed, self.drain_rate())
+        self.current_camera = self.graph.cameras[0]
+
+        if animatronics is None:
+            animatronics = create_animatronics(self.graph)
+        self.animatronics = Roster(animatronics)
+
+        self.outcome: Optional[GameState] = None
+        self.jumpscare_animatronic: Optional[Animatronic] = None
+
+    # Toggling any of these recomputes the drain rate; nothing else does
+    left_door_closed = _control("left_door_closed")
+    right_door_closed = _control("right_door_closed")
+    left_light_on = _control("left_light_on")
+    right_light_on = _control("right_light_on")
+    camera_open = _control("camera_open")
+
+    @property
+    def power(self) -> float:
+        """Remaining power, evaluated in closed form at the current time"""
+        return self.power_model.power_at(self.time_elapsed)
+
+    @power.setter
+    def power(self, value: float):
+        self.power_model.rebase(self.time_elapsed, value, self.power_model.drain_rate)
+
+    def time_until_power_out(self) -> float:
+        """Seconds until check_power_out fires if the controls stay as they are"""
+        return self.power_model.time_until_power_out(self.time_elapsed)
+
+    @property
+    def finished(self) -> bool:
+        """True once the night has been won or lost"""
+        return self.outcome is not None
+
+    def update_time(self, dt: float):
+        """Update in-game time"""
+        self.time_elapsed += dt
+        self.game_hour = int((self.time_elapsed / NIGHT_LENGTH) * FINAL_HOUR)
+
+        if self.game_hour >= FINAL_HOUR:
+            self.outcome = GameState.WIN
+
+    def drain_rate(self) -> float:
+        """Power drain per second for the current office controls"""
+        drain_rate = BASE_DRAIN
+
+        if self._left_door_closed:
+            drain_rate += DOOR_DRAIN
+        if self._right_door_closed:
+            drain_rate += DOOR_DRAIN
+        if self._left_light_on:
+            drain_rate += LIGHT_DRAIN
+        if self._right_light_on:
+            drain_rate += LIGHT_DRAIN
+        if self._camera_open:
+            drain_rate += CAMERA_DRAIN
+        return drain_rate
+
+    def update_animatronics(self, dt: float):
+        """Update all animatronics"""
+        rng = self.rng
+        game_hour = self.game_hour
+        move_chance = self.difficulty.move_chance
+        for anim in self.animatronics:
+            # Inline the countdown that Animatronic.update does on most ticks;
+            # only an expired timer pays for the method call and its rolls
+            timer = anim.move_timer - dt
+            if timer > 0 and anim.active:
+                anim.move_timer = timer
+            elif anim.update(dt, game_hour, rng, move_chance(anim, game_hour)):
+                self.resolve_move(anim)
+
+    def resolve_move(self, anim: Animatronic):
+        """Move an animatronic that won its movement roll, attacking through open doors"""
+        rng = self.rng
+        graph = self.graph
+        # Check if animatronic is at a door
+        if anim.location == graph.left_door:
+            # Pass door state to check for retreat
+            anim.move(door_blocked=self.left_door_closed, rng=rng, graph=graph)
+            # Only attack if door is open
+            if not self.left_door_closed:
+                if rng.random() < self.difficulty.attack_chance(anim, self.game_hour):
+                    self.trigger_jumpscare(anim)
+        elif anim.location == graph.right_door:
+            anim.move(door_blocked=self.right_door_closed, rng=rng, graph=graph)
+            # Only attack if door is open
+            if not self.right_door_closed:
+                if rng.random() < self.difficulty.attack_chance(anim, self.game_hour):
+                    self.trigger_jumpscare(anim)
+        else:
+            anim.move(door_blocked=False, rng=rng, graph=graph)
+
+    def apply(self, action: Action, arg: Optional[int] = None):
+        """Apply a player action to the office controls"""
+        if action == Action.TOGGLE_LEFT_DOOR:
+            self.left_door_closed = not self.left_door_closed
+        elif action == Action.TOGGLE_RIGHT_DOOR:
+            self.right_door_closed = not self.right_door_closed
+        elif action == Action.TOGGLE_LEFT_LIGHT:
+            self.left_light_on = not self.left_light_on
+        elif action == Action.TOGGLE_RIGHT_LIGHT:
+            self.right_light_on = not self.right_light_on
+        elif action == Action.OPEN_CAMERA:
+            self.camera_open = True
+        elif action == Action.CLOSE_CAMERA:
+            self.camera_open = False
+        elif action == Action.SELECT_CAMERA:
+            self.current_camera = self.graph.locations[arg]
+
+    def observe(self) -> Observation:
+        """Snapshot of what the player could see right now"""
+        roster = self.animatronics
+        graph = self.graph
+        return Observation(
+            time_elapsed=self.time_elapsed,
+            power=self.power,
+            game_hour=self.game_hour,
+            left_door_closed=self._left_door_closed,
+            right_door_closed=self._right_door_closed,
+            left_light_on=self._left_light_on,
+            right_light_on=self._right_light_on,
+            camera_open=self._camera_open,
+            current_camera=self.current_camera.value,
+            camera_view=tuple(roster.names_at(self.current_camera)) if self._camera_open else (),
+            left_door_view=tuple(roster.names_at(graph.left_door)) if self._left_light_on else (),
+            right_door_view=tuple(roster.names_at(graph.right_door)) if self._right_light_on else (),
+        )
+
+    def trigger_jumpscare(self, animatronic: Animatronic):
+        """End the night with a jumpscare from the given animatronic"""
+        self.jumpscare_animatronic = animatronic
+        self.outcome = GameState.GAME_OVER
+
+    def check_power_out(self):
+        """Check if power is depleted"""
+        if self.power <= 0:
+            self.trigger_jumpscare(self.animatronics[0])  # Freddy gets you
+
+    def step(self, dt: float):
+        """Advance the night by one tick of dt seconds"""
+        # Power follows time through the power model, so it needs no update
+        self.update_time(dt)
+        self.update_animatronics(dt)
+        self.check_power_out()
+
+    def run(self, dt: float = 1 / 60) -> GameState:
+        """Step the night at a fixed dt until it is won or lost, returning the outcome"""
+        while self.outcome is None:
+            self.step(dt)
+        return self.outcome
+
+    def run_events(self, on_event: Optional[Callable[["NightSimulation"], None]] = None) -> GameState:
+        """Run the night on a next-event scheduler instead of fixed ticks.
+
+        Movement opportunities, hour boundaries and the power-out moment are
+        kept as timestamped events in a heap, so a night costs O(events)
+        rather than O(frames x animatronics). on_event, if given, is called
+        after every event and may change the office controls; the power-out
+        event is then re-predicted from the power model.
+        """
+        queue = []
+        seq = count()  # tie-breaker so equal timestamps pop in push order
+        now = self.time_elapsed
+
+        for anim in self.animatronics:
+            if anim.active:
+                heapq.heappush(queue, (now + anim.move_timer, next(seq), EVENT_MOVE, anim))
+        hour_length = NIGHT_LENGTH / FINAL_HOUR
+        for hour in range(self.game_hour + 1, FINAL_HOUR + 1):
+            heapq.heappush(queue, (hour * hour_length, next(seq), EVENT_HOUR, hour))
+
+        model = self.power_model
+        power_version = model.version
+        heapq.heappush(queue, (model.power_out_time, next(seq), EVENT_POWER_OUT, power_version))
+
+        while self.outcome is None and queue:
+            time, _, kind, payload = heapq.heappop(queue)
+            if kind == EVENT_POWER_OUT and payload != model.version:
+                continue  # controls changed after this was predicted
+
+            self.time_elapsed = time
+
+            if kind == EVENT_MOVE:
+                payload.move_timer = 0.0
+                if payload.update(0.0, self.game_hour, self.rng,
+                                  self.difficulty.move_chance(payload, self.game_hour)):
+                    self.resolve_move(payload)
+                heapq.heappush(queue, (time + payload.move_timer, next(seq), EVENT_MOVE, payload))
+            elif kind == EVENT_HOUR:
+                self.game_hour = payload
+                if payload >= FINAL_HOUR:
+                    self.outcome = GameState.WIN
+            else:
+                self.check_power_out()
+
+            if on_event is not None and self.outcome is None:
+                on_event(self)
+                # A power model swapped in by on_event counts as a change too
+                if self.power_model is not model or model.version != power_version:
+                    model = self.power_model
+                    power_version = model.version
+                    heapq.heappush(queue, (model.power_out_time, next(seq),
+                                           EVENT_POWER_OUT, power_version))
+        return self.outcome
@@ -0,0 +1,196 @@
+"""
+Local control and observation endpoint for a running game.
+
+Serves newline-delimited JSON over a Unix socket or a localhost TCP port
+from the same asyncio loop as Game.run_async. Requests are handled in the
+gaps between frames, so they never race the simulation, and each client
+writes through its own stream, so a slow reader delays only itself.
+
+Requests, one JSON object per line:
+    {"cmd": "snapshot"}                         current state
+    {"cmd": "subscribe", "interval": 0.5}       stream snapshots until disconnect
+    {"cmd": "action", "action": "TOGGLE_LEFT_DOOR", "arg": null}
+    {"cmd": "start"}                            start a night from the menu or an end screen
+    {"cmd": "health"}                           frame rate, frame count, uptime
+Every reply is a JSON line with "ok" set, and "error" when it is false.
+
+Usage:
+    python maingame.py --control-socket /tmp/fnab.sock
+    python control.py --socket /tmp/fnab.sock snapshot
+    python control.py --port 8765 subscribe --interval 1
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, Optional, Set
+
+from class_function import Action, GameState
+
+LOCALHOST = "127.0.0.1"
+DEFAULT_INTERVAL = 0.5  # seconds between streamed snapshots
+MIN_INTERVAL = 1 / 60
+PLAYER_STATES = (GameState.PLAYING, GameState.CAMERA)
+
+
+def snapshot(game) -> Dict[str, object]:
+    """What a dashboard needs to follow the game, as plain JSON types"""
+    sim = game.sim
+    return {
+        "state": game.state.name,
+        "time": round(sim.time_elapsed, 3),
+        "hour": sim.game_hour,
+        "power": round(sim.power, 3),
+        "left_door_closed": sim.left_door_closed,
+        "right_door_closed": sim.right_door_closed,
+        "left_light_on": sim.left_light_on,
+        "right_light_on": sim.right_light_on,
+        "camera_open": sim.camera_open,
+        "current_camera": sim.current_camera.name,
+        "animatronics": {anim.name: anim.location.name for anim in sim.animatronics},
+    }
+
+
+class ControlServer:
+    """JSON-lines control endpoint for a Game running under run_async()"""
+
+    def __init__(self, game, path: Optional[str] = None, port: Optional[int] = None):
+        if (path is None) == (port is None):
+            raise ValueError("give exactly one of a socket path or a port")
+        self.game = game
+        self.path = path
+        self.port = port
+        self.started = time.perf_counter()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.Task] = set()
+
+    async def start(self):
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._serve, LOCALHOST, self.port)
+            # Port 0 asks the OS for a free port; report the one it picked
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._clients):
+                task.cancel()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get("cmd") == "subscribe":
+                        await self._stream(writer, float(request.get("interval", DEFAULT_INTERVAL)))
+                        break
+                    reply = self.handle(request)
+                except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                    reply = {"ok": False, "error": str(exc)}
+                await self._send(writer, reply)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(task)
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, reply: Dict[str, object]):
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter, interval: float):
+        interval = max(interval, MIN_INTERVAL)
+        while True:
+            await self._send(writer, dict(snapshot(self.game), ok=True))
+            await asyncio.sleep(interval)
+
+    def handle(self, request: Dict[str, object]) -> Dict[str, object]:
+        """Reply to a single request; runs between frames on the game's loop"""
+        game = self.game
+        command = request.get("cmd")
+        if command == "snapshot":
+            return dict(snapshot(game), ok=True)
+        if command == "health":
+            return {"ok": True, "fps": round(game.clock.get_fps(), 2), "frames": game.frames,
+                    "uptime": round(time.perf_counter() - self.started, 3)}
+        if command == "action":
+            if game.state not in PLAYER_STATES:
+                return {"ok": False, "error": f"no night in progress ({game.state.name})"}
+            action = Action[request["action"]]
+            arg = request.get("arg")
+            if action == Action.SELECT_CAMERA:
+                graph = game.sim.graph
+                if not isinstance(arg, int) or not 0 <= arg < len(graph) \
+                        or graph.locations[arg] not in graph.cameras:
+                    raise ValueError(f"SELECT_CAMERA needs a camera location index, got {arg!r}")
+            game.perform(action, arg)
+            return {"ok": True}
+        if command == "start":
+            if game.state in PLAYER_STATES:
+                return {"ok": False, "error": "a night is already in progress"}
+            game.start_night()
+            return {"ok": True}
+        raise ValueError(f"unknown command {command!r}")
+
+
+# ============= CLIENT =============
+
+async def _client(args):
+    if args.socket:
+        reader, writer = await asyncio.open_unix_connection(args.socket)
+    else:
+        reader, writer = await asyncio.open_connection(LOCALHOST, args.port)
+    request: Dict[str, object] = {"cmd": args.command}
+    if args.command == "subscribe":
+        request["interval"] = args.interval
+    elif args.command == "action":
+        request["action"] = args.action
+        request["arg"] = args.arg
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    ok = True
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        print(line.decode().rstrip(), flush=True)
+        ok = json.loads(line).get("ok", False)
+        if args.command != "subscribe":
+            break
+    writer.close()
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talk to a running game's control endpoint")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--socket", metavar="PATH", help="Unix socket given to --control-socket")
+    target.add_argument("--port", type=int, help="localhost port given to --control-port")
+    parser.add_argument("command", choices=("snapshot", "subscribe", "action", "start", "health"))
+    parser.add_argument("action", nargs="?", help="Action name for the action command")
+    parser.add_argument("--arg", type=int, help="action argument (camera location index)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between streamed snapshots")
+    args = parser.parse_args(argv)
+    if args.command == "action" and not args.action:
+        parser.error("the action command needs an Action name")
+    try:
+        ok = asyncio.run(_client(args))
+    except KeyboardInterrupt:
+        ok = True
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
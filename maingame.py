@@ -1,17 +1,43 @@
-import pygame
+import argparse
+import os
+import json
 import random
 import sys
-from typing import List
-from class_function import GameState, Location, Animatronic, create_animatronics
-
-# Initialize Pygame
-pygame.init()
+import time
+from typing import List, Tuple
+from class_function import (GameState, Location, Animatronic, NightSimulation, Action,
+                            DifficultyModel, load_difficulty_model)
+from belief import Belief
+# pygame and the renderer load with the first Game, and replay, profiler,
+# telemetry, snapshot, search and arena only with the feature that needs them,
+# so importing this module for its constants stays cheap
+pygame = None
+rendering = None
 
 # Constants
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
-FPS = 60
-NIGHT_LENGTH = 120  # 2 minuter per match
+FPS = 60  # render rate cap; 0 renders as fast as the display allows
+TICK_RATE = 60  # simulation ticks per second, independent of the render rate
+MAX_FRAME_TIME = 0.25  # longest wall-clock gap fed into the tick accumulator
+MAX_TICKS_PER_FRAME = 8  # beyond this the backlog is dropped instead of chased
+TOGGLE_COOLDOWN = 10 / 60  # seconds between repeats of a held door or light key
+CAMERA_SWITCH_COOLDOWN = 12 / 60  # seconds between repeats of a held arrow key
+PROFILER_TOGGLE_KEY = None  # pygame.K_F3, set by load_display()
+HINT_KEY = None  # pygame.K_h, set by load_display()
+HINT_ITERATIONS = 150  # search iterations behind each hint
+HINT_SLICE = 0.003  # seconds of each frame spent on a pending hint search
+HINT_DURATION = 4.0  # night seconds a hint stays on screen
+CHECKPOINT_INTERVAL = 10.0  # night seconds between autosaves when checkpointing
+TEXT_CACHE_SIZE = 256
+NOISE_POOL_SIZE = 8
+NOISE_MEMORY_BUDGET_MB = 32
+# Render quality levels, cheapest last; "auto" lets the governor choose from frame times
+QUALITY_LEVELS = ("full", "reduced", "minimal", "partial")
+QUALITY_REDUCED = 1  # half the camera static dots and scanlines
+QUALITY_MINIMAL = 2  # no camera static or scanlines at all
+QUALITY_PARTIAL = 3  # push only changed regions, as with --dirty-rects
+REDUCED_EFFECT_DENSITY = 0.5
 
 # Colors
 BLACK = (0, 0, 0)
@@ -31,139 +57,401 @@ MUTED_RED = (180, 50, 50)
 MUTED_GREEN = (100, 180, 100)
 DIM_YELLOW = (180, 160, 80) 
 
+
+def _sim_attribute(name: str) -> property:
+    """Expose a NightSimulation attribute as a read/write property on Game"""
+    return property(lambda self: getattr(self.sim, name),
+                    lambda self, value: setattr(self.sim, name, value))
+
+
+# Screen regions, built as pygame.Rects by load_display()
+CAMERA_FEED_RECT = None  # part of the camera monitor covered by static and scanlines
+PROFILER_OVERLAY_RECT = None
+HINT_RECT = None
+
+
+def load_display():
+    """Import pygame and the renderer, then build the keys and regions that need them"""
+    global pygame, rendering, PROFILER_TOGGLE_KEY, HINT_KEY
+    global CAMERA_FEED_RECT, PROFILER_OVERLAY_RECT, HINT_RECT
+    if pygame is not None:
+        return
+    import pygame
+    import rendering
+    PROFILER_TOGGLE_KEY = pygame.K_F3
+    HINT_KEY = pygame.K_h
+    CAMERA_FEED_RECT = pygame.Rect(70, 70, SCREEN_WIDTH - 140, SCREEN_HEIGHT - 190)
+    PROFILER_OVERLAY_RECT = pygame.Rect(15, 105, 340, 250)
+    HINT_RECT = pygame.Rect(SCREEN_WIDTH // 2 - 260, 90, 520, 30)
+
+# Methods timed by the frame profiler, per Game and per NightSimulation
+PROFILED_GAME_METHODS = ("poll_events", "handle_input", "update_night",
+                         "draw_menu", "draw_office", "draw_camera", "draw_hud",
+                         "draw_game_over", "draw_win", "present")
+PROFILED_SIM_METHODS = ("update_time", "update_animatronics", "check_power_out")
+
 class Game:
-    def __init__(self):
+    def __init__(self, dirty_rects: bool = False, noise_pool_size: int = NOISE_POOL_SIZE,
+                 noise_memory_budget_mb: int = NOISE_MEMORY_BUDGET_MB,
+                 record_dir: str = None, tick_rate: int = TICK_RATE, fps: int = FPS,
+                 profile: bool = False, profile_output: str = None,
+                 difficulty: DifficultyModel = None, bot: "Policy" = None,
+                 telemetry_dir: str = None, checkpoint_path: str = None, quality: str = "auto"):
+        load_display()
+        # Only the display is started up front: fonts load on first use and
+        # audio and joystick support are never initialised
+        started = time.perf_counter()
+        pygame.display.init()
+        display_ready = time.perf_counter()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Five Nights at Blankas")
+        window_ready = time.perf_counter()
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.large_font = pygame.font.Font(None, 48)
-        self.small_font = pygame.font.Font(None, 24)
-        self.tiny_font = pygame.font.Font(None, 20)
+        self.fps = fps
+        # Logic advances in fixed ticks; rendering interpolates between them
+        self.tick_dt = 1.0 / tick_rate
+        self.accumulator = 0.0
+        # All four fonts share one text cache; most labels repeat every frame
+        self.text_cache = rendering.TextCache(maxsize=TEXT_CACHE_SIZE)
+        self.font = rendering.CachedFont.lazy(None, 36, self.text_cache)
+        self.large_font = rendering.CachedFont.lazy(None, 48, self.text_cache)
+        self.small_font = rendering.CachedFont.lazy(None, 24, self.text_cache)
+        self.tiny_font = rendering.CachedFont.lazy(None, 20, self.text_cache)
+        self.layers = rendering.LayerCache()
+        self._camera_button_layout = None
+        self.camera_effects = rendering.CameraEffects(CAMERA_FEED_RECT, pool_size=noise_pool_size,
+                                                      memory_budget=noise_memory_budget_mb * 1024 * 1024)
+        # Optional dirty-rect presentation: push only changed regions each frame
+        self.dirty_rects = dirty_rects
+        self.dirty = rendering.DirtyRectTracker() if dirty_rects else None
+        # Render quality, fixed or stepped by the governor to hold the frame budget
+        self.quality = 0
+        self.governor = None
+        if quality == "auto":
+            self.governor = rendering.QualityGovernor(1000.0 / (fps or FPS), len(QUALITY_LEVELS))
+        else:
+            self.set_quality(QUALITY_LEVELS.index(quality))
+        self.last_presented = None
+        self.frames = 0
         
         self.state = GameState.MENU
         self.mouse_pos = (0, 0)
+        # Nights are logged for deterministic replay when a directory is given
+        self.record_dir = record_dir
+        self.recorder = None
+        # Gameplay metrics stream to compressed files from a background thread
+        self.telemetry = None
+        if telemetry_dir:
+            from telemetry import Telemetry
+            self.telemetry = Telemetry.create(telemetry_dir)
+        # Running nights are autosaved here so they can be resumed after a crash
+        self.checkpoint_path = checkpoint_path
+        self.difficulty = difficulty
+        # An automated player, if any, plays through the same actions as the keyboard
+        self.bot = bot
+        if bot is not None:
+            from arena import DECISION_INTERVAL
+            self.bot_interval = DECISION_INTERVAL
+        # Optional per-section frame timing; F3 toggles its overlay
+        self.profiler = None
+        self.profile_output = profile_output
+        if profile or profile_output:
+            from profiler import FrameProfiler
+            self.profiler = FrameProfiler()
+            self.profiler.instrument(self, PROFILED_GAME_METHODS)
         self.reset_game()
+        
+        # Seconds spent in each part of construction, for --startup-report
+        self.startup_phases = {
+            "display_init": display_ready - started,
+            "window": window_ready - display_ready,
+            "game_init": time.perf_counter() - window_ready,
+        }
     
     def reset_game(self):
         """Reset game state for new night"""
-        self.power = 100.0
-        self.time_elapsed = 0
-        self.game_hour = 0  # 0-6 (12AM to 6AM)
-        
-        self.left_door_closed = False
-        self.right_door_closed = False
-        self.left_light_on = False
-        self.right_light_on = False
-        self.camera_open = False
-        self.current_camera = Location.STAGE
-        
-        # Create animatronics with varying AI levels
-        self.animatronics = create_animatronics()
+        self.seed = random.getrandbits(64)
+        self.sim = NightSimulation(rng=random.Random(self.seed), difficulty=self.difficulty)
+        if self.profiler is not None:
+            self.profiler.instrument(self.sim, PROFILED_SIM_METHODS, prefix="sim.")
         
         self.jumpscare_timer = 0
-        self.jumpscare_animatronic = None
-        
-        # Separate toggle cooldowns for each control
+        self.hint = None
+        self.hint_until = 0.0
+        self.hint_search = None
+        self.hint_rng = random.Random(f"{self.seed}/hint")
+        # What the player has seen, so hints never use positions kept from them
+        self.belief = Belief(self.sim)
+        
+        if self.bot is not None:
+            self.bot.reset(random.Random(f"{self.seed}/bot"))
+            self.bot.bind(self.sim)
+            self.bot_next_decision = 0.0
+        
+        # Power before the latest tick and how far rendering is into the next one
+        self.previous_power = self.sim.power
+        self.alpha = 1.0
+        self.next_checkpoint = CHECKPOINT_INTERVAL
+        
+        # Separate toggle cooldowns for each control, in simulation seconds
         self.left_door_cooldown = 0
         self.right_door_cooldown = 0
         self.left_light_cooldown = 0
         self.right_light_cooldown = 0
         self.camera_cooldown = 0
     
-    def update_power(self, dt: float):
-        """Update power consumption"""
-        drain_rate = 0.1  # Base drain
-        
-        if self.left_door_closed:
-            drain_rate += 0.4
-        if self.right_door_closed:
-            drain_rate += 0.4
-        if self.left_light_on:
-            drain_rate += 0.2
-        if self.right_light_on:
-            drain_rate += 0.2
-        if self.camera_open:
-            drain_rate += 0.1
-        
-        self.power -= drain_rate * dt
-        self.power = max(0, self.power)
+    # Night state lives on the headless simulation; the view reads and toggles it
+    power = _sim_attribute("power")
+    time_elapsed = _sim_attribute("time_elapsed")
+    game_hour = _sim_attribute("game_hour")
+    left_door_closed = _sim_attribute("left_door_closed")
+    right_door_closed = _sim_attribute("right_door_closed")
+    left_light_on = _sim_attribute("left_light_on")
+    right_light_on = _sim_attribute("right_light_on")
+    camera_open = _sim_attribute("camera_open")
+    current_camera = _sim_attribute("current_camera")
+    animatronics = _sim_attribute("animatronics")
+    jumpscare_animatronic = _sim_attribute("jumpscare_animatronic")
     
-    def update_time(self, dt: float):
-        """Update in-game time"""
-        self.time_elapsed += dt
-        self.game_hour = int((self.time_elapsed / NIGHT_LENGTH) * 6)
-        
-        if self.game_hour >= 6:
+    def start_night(self):
+        """Begin a fresh night, recording it if enabled"""
+        self.stop_recording()
+        self.reset_game()
+        if self.record_dir:
+            from replay import NightRecorder
+            self.recorder = NightRecorder.create(self.record_dir, self.seed, self.difficulty)
+        if self.telemetry is not None:
+            self.telemetry.night_start(self.sim, self.seed)
+        self.state = GameState.PLAYING
+    
+    def stop_recording(self):
+        """Close the current night log, if any"""
+        if self.recorder is not None:
+            self.recorder.finish(self.sim)
+            self.recorder = None
+    
+    def perform(self, action: Action, arg: int = None):
+        """Apply a player action to the night and log it"""
+        self.sim.apply(action, arg)
+        if self.recorder is not None:
+            self.recorder.record_action(action, arg)
+        if self.telemetry is not None:
+            self.telemetry.action(self.sim, action, arg)
+        # The screen follows the monitor, whoever raised or lowered it
+        if action == Action.OPEN_CAMERA:
+            self.state = GameState.CAMERA
+        elif action == Action.CLOSE_CAMERA:
+            self.state = GameState.PLAYING
+    
+    def run_bot(self):
+        """Let the automated player act when its next decision is due"""
+        if self.sim.time_elapsed < self.bot_next_decision:
+            return
+        for action, arg in self.bot.act(self.sim.observe()):
+            self.perform(action, arg)
+        self.bot_next_decision += self.bot_interval
+    
+    def update_night(self, dt: float):
+        """Advance the night simulation and mirror its outcome in the game state"""
+        if self.recorder is not None:
+            # Step by the same quantized dt the log stores so replays are exact
+            dt = self.recorder.tick(dt)
+        self.previous_power = self.sim.power
+        self.sim.step(dt)
+        if self.sim.camera_open or self.sim.left_light_on or self.sim.right_light_on:
+            self.belief.observe(self.sim.observe())
+        if self.telemetry is not None:
+            self.telemetry.tick(self.sim)
+        
+        if self.sim.outcome == GameState.GAME_OVER:
+            self.trigger_jumpscare(self.sim.jumpscare_animatronic)
+        elif self.sim.outcome == GameState.WIN:
             self.state = GameState.WIN
+        if self.sim.finished:
+            self.stop_recording()
+            if self.telemetry is not None:
+                self.telemetry.night_end(self.sim)
+        elif self.checkpoint_path and self.sim.time_elapsed >= self.next_checkpoint:
+            self.write_checkpoint()
+            self.next_checkpoint += CHECKPOINT_INTERVAL
+    
+    def save_snapshot(self) -> bytes:
+        """The night and the view state around it as a compact binary blob"""
+        from snapshot import pack_game
+        return pack_game(self)
+    
+    def load_snapshot(self, blob: bytes):
+        """Continue from a blob made by save_snapshot.
+
+        Telemetry follows the restored night under its original id. It is
+        not recorded: a night log replays from the seed and has to hold the
+        whole night, so recording resumes with the next night started.
+        """
+        from snapshot import unpack_game
+        self.stop_recording()
+        attributes, night = unpack_game(blob)
+        self.sim = night.restore(difficulty=self.difficulty)
+        if self.profiler is not None:
+            self.profiler.instrument(self.sim, PROFILED_SIM_METHODS, prefix="sim.")
+        for name, value in attributes.items():
+            setattr(self, name, value)
+        if self.bot is not None:
+            self.bot.reset(random.Random(f"{self.seed}/bot"))
+            self.bot.bind(self.sim)
+        if self.telemetry is not None and not self.sim.finished:
+            self.telemetry.night_resume(self.sim, self.seed)
+        # Sightings before the snapshot are not saved; the player starts over from the start node
+        self.belief = Belief(self.sim)
+        self.hint_search = None
+        self.hint_rng = random.Random(f"{self.seed}/hint")
+        # The next autosave is the first one due after the restored time
+        self.next_checkpoint = (self.sim.time_elapsed // CHECKPOINT_INTERVAL + 1) * CHECKPOINT_INTERVAL
+        self.alpha = 1.0
+    
+    def write_checkpoint(self):
+        """Save a snapshot to checkpoint_path, replacing the old one atomically"""
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, "wb") as out:
+            out.write(self.save_snapshot())
+        os.replace(temporary, self.checkpoint_path)
+    
+    def advance(self, frame_time: float) -> int:
+        """Run the fixed ticks owed for frame_time seconds; returns how many ran"""
+        # A long stall (window drag, breakpoint) must not snowball into ever
+        # longer catch-up frames, so both the input and the tick count are capped
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        tick_dt = self.tick_dt
+        ticks = 0
+        while self.accumulator >= tick_dt and ticks < MAX_TICKS_PER_FRAME:
+            self.tick(tick_dt)
+            self.accumulator -= tick_dt
+            ticks += 1
+        if ticks == MAX_TICKS_PER_FRAME:
+            self.accumulator %= tick_dt
+        self.alpha = self.accumulator / tick_dt
+        return ticks
     
-    def update_animatronics(self, dt: float):
-        """Update all animatronics"""
-        for anim in self.animatronics:
-            if anim.update(dt, self.game_hour):
-                # Check if animatronic is at a door
-                if anim.location == Location.LEFT_DOOR:
-                    # Pass door state and dt to check for retreat
-                    anim.move(door_blocked=self.left_door_closed, dt=dt)
-                    # Only attack if door is open 
-                    if not self.left_door_closed:
-                        attack_chance = 0.8 + (anim.ai_level * 0.05) + (self.game_hour * 0.05)
-                        if random.random() < attack_chance:
-                            self.trigger_jumpscare(anim)
-                elif anim.location == Location.RIGHT_DOOR:
-                    anim.move(door_blocked=self.right_door_closed, dt=dt)
-                    # Only attack if door is open
-                    if not self.right_door_closed:
-                        attack_chance = 0.8 + (anim.ai_level * 0.05) + (self.game_hour * 0.05)
-                        if random.random() < attack_chance:
-                            self.trigger_jumpscare(anim)
-                else:
-                    anim.move(door_blocked=False, dt=dt)
+    def tick(self, dt: float):
+        """One fixed simulation step: held keys, the night and the jumpscare"""
+        self.handle_input(dt)
+        
+        if self.state == GameState.PLAYING or self.state == GameState.CAMERA:
+            if self.bot is not None:
+                self.run_bot()
+            self.update_night(dt)
+        
+        if self.state == GameState.GAME_OVER and self.jumpscare_timer > 0:
+            self.jumpscare_timer -= dt
+    
+    @property
+    def display_power(self) -> float:
+        """Power interpolated between the last two ticks for smooth rendering"""
+        return self.previous_power + (self.power - self.previous_power) * self.alpha
     
     def trigger_jumpscare(self, animatronic: Animatronic):
         """Trigger game over with jumpscare"""
-        self.jumpscare_animatronic = animatronic
+        self.sim.jumpscare_animatronic = animatronic
         self.jumpscare_timer = 2.0
         self.state = GameState.GAME_OVER
     
-    def check_power_out(self):
-        """Check if power is depleted"""
-        if self.power <= 0:
-            self.trigger_jumpscare(self.animatronics[0])  # Freddy gets you
+    def show_hint(self):
+        """Start searching the night as the player knows it; update_hint() finishes it"""
+        from search import HintSearch  # only games that ask for a hint load the search
+        self.hint = None
+        self.hint_search = HintSearch(self.sim, self.belief, HINT_ITERATIONS,
+                                      self.hint_rng.getrandbits(64))
+    
+    def update_hint(self):
+        """Grow a pending hint search by one slice and show its advice once it is done"""
+        if self.hint_search is None:
+            return
+        if self.state not in [GameState.PLAYING, GameState.CAMERA]:
+            self.hint_search = None
+            return
+        text = self.hint_search.step(HINT_SLICE)
+        if text is not None:
+            self.hint = text
+            self.hint_until = self.sim.time_elapsed + HINT_DURATION
+            self.hint_search = None
+    
+    def mark_dirty(self, name: str, rect, key: object = None):
+        """Report a dynamic screen region to the dirty-rect renderer, if enabled"""
+        if self.dirty is not None:
+            self.dirty.mark(name, pygame.Rect(rect), key)
+    
+    def set_quality(self, level: int):
+        """Switch render quality; higher levels trade cosmetic detail for frame time"""
+        self.quality = level
+        self.camera_effects.set_density(REDUCED_EFFECT_DENSITY if level >= QUALITY_REDUCED else 1.0)
+        if self.dirty_rects or level >= QUALITY_PARTIAL:
+            if self.dirty is None:
+                self.dirty = rendering.DirtyRectTracker()
+        else:
+            self.dirty = None
+        if self.dirty is not None:
+            # Regions that stopped being drawn, such as the static, need repainting
+            self.dirty.request_full()
+    
+    def govern(self, frame_ms: float):
+        """Report a frame's work time to the quality governor, if it is running"""
+        if self.governor is not None and self.governor.observe(frame_ms):
+            self.set_quality(self.governor.level)
+    
+    def present(self, full: bool = False):
+        """Show the drawn frame, as a full flip or as dirty rectangles"""
+        if self.dirty is None:
+            pygame.display.flip()
+            return
+        if full:
+            self.dirty.request_full()
+        self.dirty.present()
+    
+    def draw_profiler(self):
+        """Draw the frame profiler overlay when it is switched on"""
+        if self.profiler is None or not self.profiler.overlay_visible:
+            return
+        self.profiler.draw_overlay(self.screen, self.tiny_font, PROFILER_OVERLAY_RECT)
+        self.mark_dirty("profiler", PROFILER_OVERLAY_RECT, self.profiler.frame_index)
     
     def draw_menu(self):
         """Draw main menu with darker, scarier atmosphere"""
-        self.screen.fill(VERY_DARK_GRAY)
+        # The whole menu is static, so it is rendered once and reused
+        menu = self.layers.get("menu", self.screen.get_size(), self._build_menu_layer)
+        self.screen.blit(menu, (0, 0))
+    
+    def _build_menu_layer(self, surface: "pygame.Surface"):
+        """Render the static menu screen"""
+        surface.fill(VERY_DARK_GRAY)
         
         # Draw subtle grid background
         for x in range(0, SCREEN_WIDTH, 80):
-            pygame.draw.line(self.screen, (30, 30, 35), (x, 0), (x, SCREEN_HEIGHT), 1)
+            pygame.draw.line(surface, (30, 30, 35), (x, 0), (x, SCREEN_HEIGHT), 1)
         for y in range(0, SCREEN_HEIGHT, 80):
-            pygame.draw.line(self.screen, (30, 30, 35), (0, y), (SCREEN_WIDTH, y), 1)
+            pygame.draw.line(surface, (30, 30, 35), (0, y), (SCREEN_WIDTH, y), 1)
         
         # Draw subtle border
-        pygame.draw.rect(self.screen, DARK_PURPLE, (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), 2)
-        pygame.draw.rect(self.screen, CHARCOAL, (20, 20, SCREEN_WIDTH - 40, SCREEN_HEIGHT - 40), 1)
+        pygame.draw.rect(surface, DARK_PURPLE, (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), 2)
+        pygame.draw.rect(surface, CHARCOAL, (20, 20, SCREEN_WIDTH - 40, SCREEN_HEIGHT - 40), 1)
         
         # Draw dark decorative lines
-        pygame.draw.line(self.screen, DARK_PURPLE, (0, 150), (SCREEN_WIDTH, 150), 2)
-        pygame.draw.line(self.screen, DARK_PURPLE, (0, SCREEN_HEIGHT - 150), (SCREEN_WIDTH, SCREEN_HEIGHT - 150), 2)
+        pygame.draw.line(surface, DARK_PURPLE, (0, 150), (SCREEN_WIDTH, 150), 2)
+        pygame.draw.line(surface, DARK_PURPLE, (0, SCREEN_HEIGHT - 150), (SCREEN_WIDTH, SCREEN_HEIGHT - 150), 2)
         
         title = self.large_font.render("FIVE NIGHTS AT BLANKAS", True, MUTED_RED)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 60))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
         subtitle = self.font.render("Can you survive until 6 AM?", True, MUTED_GREEN)
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 120))
-        self.screen.blit(subtitle, subtitle_rect)
+        surface.blit(subtitle, subtitle_rect)
         
         # Start button with darker styling
         start_button_rect = pygame.Rect(SCREEN_WIDTH // 2 - 150, 210, 300, 60)
-        pygame.draw.rect(self.screen, DARK_RED, start_button_rect)
-        pygame.draw.rect(self.screen, MUTED_RED, start_button_rect, 2)
+        pygame.draw.rect(surface, DARK_RED, start_button_rect)
+        pygame.draw.rect(surface, MUTED_RED, start_button_rect, 2)
         start_text = self.font.render("Press SPACE to Start", True, WHITE)
         start_rect = start_text.get_rect(center=start_button_rect.center)
-        self.screen.blit(start_text, start_rect)
+        surface.blit(start_text, start_rect)
         
         # Draw controls with better formatting
         controls = [
@@ -189,31 +477,22 @@ class Game:
             else:
                 text = self.tiny_font.render(line, True, GRAY)
             rect = text.get_rect(center=(SCREEN_WIDTH // 2, y))
-            self.screen.blit(text, rect)
+            surface.blit(text, rect)
             y += 22
     
     def draw_office(self):
         """Draw office view - FNAF style with dark, scary atmosphere"""
-        # Very dark walls
-        self.screen.fill(VERY_DARK_GRAY)
-        
-        # Draw office interior (desk area)
-        pygame.draw.rect(self.screen, (30, 25, 35), (0, 400, SCREEN_WIDTH, 320))
-        pygame.draw.rect(self.screen, DARK_PURPLE, (0, 400, SCREEN_WIDTH, 3))
-        pygame.draw.rect(self.screen, (45, 40, 55), (100, 380, SCREEN_WIDTH - 200, 340), 2)
-        
-        # Draw left side panel with darker styling
-        pygame.draw.rect(self.screen, CHARCOAL, (10, 360, 200, 360))
-        pygame.draw.rect(self.screen, DARK_PURPLE, (10, 360, 200, 360), 2)
-        
-        # Draw right side panel
-        pygame.draw.rect(self.screen, CHARCOAL, (SCREEN_WIDTH - 210, 360, 200, 360))
-        pygame.draw.rect(self.screen, DARK_PURPLE, (SCREEN_WIDTH - 210, 360, 200, 360), 2)
+        # Walls, desk and side panels never change
+        office = self.layers.get("office", self.screen.get_size(), self._build_office_layer)
+        self.screen.blit(office, (0, 0))
         
         # Draw doors with darker, scary appearance
         left_door_color = (80, 20, 20) if self.left_door_closed else (50, 50, 55)
         right_door_color = (80, 20, 20) if self.right_door_closed else (50, 50, 55)
         
+        self.mark_dirty("left_door", (30, 400, 120, 280), self.left_door_closed)
+        self.mark_dirty("right_door", (SCREEN_WIDTH - 150, 400, 120, 280), self.right_door_closed)
+        
         # Left door visual
         pygame.draw.rect(self.screen, left_door_color, (30, 400, 120, 280))
         pygame.draw.rect(self.screen, MUTED_RED if self.left_door_closed else GRAY, (30, 400, 120, 280), 2)
@@ -238,6 +517,7 @@ class Game:
         
         # Left light panel with toggle switch appearance
         light_rect_left = pygame.Rect(20, 370, 180, 70)
+        self.mark_dirty("left_light", light_rect_left, self.left_light_on)
         pygame.draw.rect(self.screen, (25, 25, 30), light_rect_left)
         pygame.draw.rect(self.screen, DARK_GREEN if self.left_light_on else DARK_GRAY, light_rect_left, 2)
         
@@ -261,6 +541,7 @@ class Game:
         
         # Right light panel with toggle switch appearance
         light_rect_right = pygame.Rect(SCREEN_WIDTH - 200, 370, 180, 70)
+        self.mark_dirty("right_light", light_rect_right, self.right_light_on)
         pygame.draw.rect(self.screen, (25, 25, 30), light_rect_right)
         pygame.draw.rect(self.screen, DARK_GREEN if self.right_light_on else DARK_GRAY, light_rect_right, 2)
         
@@ -284,6 +565,7 @@ class Game:
         # Camera button - center top with darker styling
         camera_button_color = DARK_GREEN if self.camera_open else (50, 50, 70)
         camera_rect = pygame.Rect(SCREEN_WIDTH // 2 - 100, 20, 200, 60)
+        self.mark_dirty("camera_button", camera_rect, self.camera_open)
         pygame.draw.rect(self.screen, camera_button_color, camera_rect)
         pygame.draw.rect(self.screen, DARK_PURPLE, camera_rect, 2)
         camera_text = self.font.render("CAMERA", True, GRAY)
@@ -291,8 +573,9 @@ class Game:
         self.screen.blit(camera_text, camera_rect_center)
         
         # Show animatronics at doors with lights - dark alerts
+        at_left = []
         if self.left_light_on:
-            at_left = [a.name for a in self.animatronics if a.location == Location.LEFT_DOOR]
+            at_left = self.animatronics.names_at(self.sim.graph.left_door)
             if at_left:
                 warning_bg = pygame.Rect(50, 80, 200, 50)
                 pygame.draw.rect(self.screen, (80, 20, 20), warning_bg)
@@ -300,8 +583,9 @@ class Game:
                 warning = self.font.render(f"⚠ {at_left[0]}", True, MUTED_RED)
                 self.screen.blit(warning, (60, 90))
         
+        at_right = []
         if self.right_light_on:
-            at_right = [a.name for a in self.animatronics if a.location == Location.RIGHT_DOOR]
+            at_right = self.animatronics.names_at(self.sim.graph.right_door)
             if at_right:
                 warning_bg = pygame.Rect(SCREEN_WIDTH - 250, 80, 200, 50)
                 pygame.draw.rect(self.screen, (80, 20, 20), warning_bg)
@@ -309,48 +593,39 @@ class Game:
                 warning = self.font.render(f"⚠ {at_right[0]}", True, MUTED_RED)
                 self.screen.blit(warning, (SCREEN_WIDTH - 240, 90))
         
+        self.mark_dirty("left_warning", (50, 80, 200, 50), at_left[:1])
+        self.mark_dirty("right_warning", (SCREEN_WIDTH - 250, 80, 200, 50), at_right[:1])
+        
         # Draw HUD
         self.draw_hud()
     
     def draw_camera(self):
         """Draw camera view - FNAF style monitor with dark atmosphere"""
-        self.screen.fill((10, 10, 12))
-        
-        # Draw monitor frame
-        monitor_rect = pygame.Rect(50, 50, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 150)
-        pygame.draw.rect(self.screen, (35, 30, 40), monitor_rect)
-        pygame.draw.rect(self.screen, DARK_PURPLE, monitor_rect, 3)
-        
-        # Draw monitor bezel
-        pygame.draw.rect(self.screen, (50, 45, 60), (40, 40, SCREEN_WIDTH - 80, SCREEN_HEIGHT - 130), 8)
-        
-        # Draw monitor screen (CRT green)
-        pygame.draw.rect(self.screen, MONITOR_COLOR, (70, 70, SCREEN_WIDTH - 140, SCREEN_HEIGHT - 190))
+        size = self.screen.get_size()
+        self.screen.blit(self.layers.get("camera", size, self._build_camera_layer), (0, 0))
         
-        # Camera static/scanlines effect
-        for _ in range(80):
-            x = random.randint(70, SCREEN_WIDTH - 70)
-            y = random.randint(70, SCREEN_HEIGHT - 120)
-            pygame.draw.circle(self.screen, (35, 90, 35), (x, y), 1)
+        at_location = self.animatronics.at(self.current_camera)
         
-        # Draw scanlines for CRT effect
-        for y in range(70, SCREEN_HEIGHT - 120, 3):
-            pygame.draw.line(self.screen, (10, 25, 10), (70, y), (SCREEN_WIDTH - 70, y), 1)
+        # Camera static/scanlines effect from the pre-generated pool, unless quality dropped it
+        if self.quality < QUALITY_MINIMAL:
+            self.camera_effects.draw(self.screen)
+            
+            # The static changes every frame, so the whole feed is always pushed
+            if self.dirty is not None:
+                self.dirty.mark_always(self.camera_effects.area)
+        else:
+            # Without it nothing else repaints the feed: push it whenever what it shows changes
+            self.mark_dirty("camera_feed", CAMERA_FEED_RECT,
+                            (self.current_camera, tuple(a.name for a in at_location)))
         
         # Show current location
-        location_names = {
-            Location.STAGE: "STAGE",
-            Location.DINING: "DINING AREA",
-            Location.HALLWAY: "HALLWAY",
-            Location.LEFT_DOOR: "LEFT DOOR",
-            Location.RIGHT_DOOR: "RIGHT DOOR"
-        }
-        
-        cam_text = self.large_font.render(f"CAM: {location_names[self.current_camera]}", True, MUTED_GREEN)
+        graph = self.sim.graph
+        cam_text = self.large_font.render(f"CAM: {graph.camera_names[self.current_camera.value]}", True, MUTED_GREEN)
         self.screen.blit(cam_text, (90, 90))
         
         # Show animatronics at current location
-        at_location = [a for a in self.animatronics if a.location == self.current_camera]
+        self.mark_dirty("camera_subjects", (SCREEN_WIDTH // 2 - 100, 140, 200, SCREEN_HEIGHT - 140),
+                        tuple(a.name for a in at_location))
         if at_location:
             y = 200
             for anim in at_location:
@@ -370,21 +645,15 @@ class Game:
             self.screen.blit(empty_text, empty_rect)
         
         # Draw camera selection buttons at bottom with dark styling
-        cam_y = SCREEN_HEIGHT - 90
-        cam_buttons = [
-            ("1-STAGE", Location.STAGE, 120),
-            ("2-DINING", Location.DINING, 320),
-            ("3-HALLWAY", Location.HALLWAY, 520),
-            ("4-LEFT", Location.LEFT_DOOR, 720),
-            ("5-RIGHT", Location.RIGHT_DOOR, 920)
-        ]
+        cam_buttons = self.camera_buttons()
+        self.mark_dirty("camera_buttons", cam_buttons[0][2].unionall([r for _, _, r in cam_buttons]),
+                        self.current_camera)
         
-        for label, loc, btn_x in cam_buttons:
+        for label, loc, btn_rect in cam_buttons:
             color = MUTED_GREEN if loc == self.current_camera else GRAY
             bg_color = (30, 60, 30) if loc == self.current_camera else CHARCOAL
             
             # Draw button background
-            btn_rect = pygame.Rect(btn_x - 70, cam_y - 25, 140, 50)
             pygame.draw.rect(self.screen, bg_color, btn_rect)
             pygame.draw.rect(self.screen, color, btn_rect, 2)
             
@@ -399,16 +668,65 @@ class Game:
         hint = self.small_font.render("Press SPACE to close camera", True, MUTED_GREEN)
         self.screen.blit(hint, (SCREEN_WIDTH // 2 - 180, SCREEN_HEIGHT - 35))
     
+    def _build_office_layer(self, surface: "pygame.Surface"):
+        """Render the static office walls, desk and side panels"""
+        # Very dark walls
+        surface.fill(VERY_DARK_GRAY)
+        
+        # Draw office interior (desk area)
+        pygame.draw.rect(surface, (30, 25, 35), (0, 400, SCREEN_WIDTH, 320))
+        pygame.draw.rect(surface, DARK_PURPLE, (0, 400, SCREEN_WIDTH, 3))
+        pygame.draw.rect(surface, (45, 40, 55), (100, 380, SCREEN_WIDTH - 200, 340), 2)
+        
+        # Draw left side panel with darker styling
+        pygame.draw.rect(surface, CHARCOAL, (10, 360, 200, 360))
+        pygame.draw.rect(surface, DARK_PURPLE, (10, 360, 200, 360), 2)
+        
+        # Draw right side panel
+        pygame.draw.rect(surface, CHARCOAL, (SCREEN_WIDTH - 210, 360, 200, 360))
+        pygame.draw.rect(surface, DARK_PURPLE, (SCREEN_WIDTH - 210, 360, 200, 360), 2)
+    
+    def _build_camera_layer(self, surface: "pygame.Surface"):
+        """Render the static monitor frame, bezel and CRT screen"""
+        surface.fill((10, 10, 12))
+        
+        # Draw monitor frame
+        monitor_rect = pygame.Rect(50, 50, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 150)
+        pygame.draw.rect(surface, (35, 30, 40), monitor_rect)
+        pygame.draw.rect(surface, DARK_PURPLE, monitor_rect, 3)
+        
+        # Draw monitor bezel
+        pygame.draw.rect(surface, (50, 45, 60), (40, 40, SCREEN_WIDTH - 80, SCREEN_HEIGHT - 130), 8)
+        
+        # Draw monitor screen (CRT green)
+        pygame.draw.rect(surface, MONITOR_COLOR, (70, 70, SCREEN_WIDTH - 140, SCREEN_HEIGHT - 190))
+    
+    def camera_buttons(self) -> List[Tuple[str, Location, "pygame.Rect"]]:
+        """Camera selection buttons (label, location, rect) laid out from the map"""
+        cameras = self.sim.graph.cameras
+        if self._camera_button_layout is None or self._camera_button_layout[0] is not cameras:
+            # Five cameras keep the classic 200 px spacing; bigger maps squeeze in
+            spacing = min(200, (SCREEN_WIDTH - 100) // len(cameras))
+            width = min(140, spacing - 10)
+            labels = self.sim.graph.camera_labels
+            buttons = [(labels[loc.value], loc,
+                        pygame.Rect(50 + spacing * i, SCREEN_HEIGHT - 115, width, 50))
+                       for i, loc in enumerate(cameras)]
+            self._camera_button_layout = (cameras, buttons)
+        return self._camera_button_layout[1]
+    
     def draw_hud(self):
         """Draw heads-up display with dark, subtle styling"""
         # Power meter background
+        power = self.display_power
         power_bg = pygame.Rect(15, 15, 250, 80)
+        self.mark_dirty("hud_power", power_bg, (int(power), int(2.2 * max(0, min(100, power)))))
         pygame.draw.rect(self.screen, CHARCOAL, power_bg)
         pygame.draw.rect(self.screen, DARK_GREEN, power_bg, 2)
         
         # Power text
-        power_color = MUTED_GREEN if self.power > 20 else MUTED_RED
-        power_text = self.font.render(f"POWER: {int(self.power)}%", True, power_color)
+        power_color = MUTED_GREEN if power > 20 else MUTED_RED
+        power_text = self.font.render(f"POWER: {int(power)}%", True, power_color)
         self.screen.blit(power_text, (25, 20))
         
         # Power bar
@@ -419,10 +737,10 @@ class Game:
         pygame.draw.rect(self.screen, (50, 50, 55), (bar_x, bar_y, bar_width, bar_height))
         
         # Power bar fill with color changes
-        power_percent = max(0, min(100, self.power)) / 100.0
-        if self.power > 50:
+        power_percent = max(0, min(100, power)) / 100.0
+        if power > 50:
             bar_fill_color = DARK_GREEN
-        elif self.power > 20:
+        elif power > 20:
             bar_fill_color = DIM_YELLOW
         else:
             bar_fill_color = MUTED_RED
@@ -433,6 +751,7 @@ class Game:
         # Time display with subtle styling
         hours = ["12 AM", "1 AM", "2 AM", "3 AM", "4 AM", "5 AM", "6 AM"]
         time_bg = pygame.Rect(SCREEN_WIDTH - 265, 15, 250, 80)
+        self.mark_dirty("hud_time", time_bg, self.game_hour)
         pygame.draw.rect(self.screen, CHARCOAL, time_bg)
         pygame.draw.rect(self.screen, DARK_PURPLE, time_bg, 2)
         
@@ -449,6 +768,13 @@ class Game:
         time_percent = min(self.game_hour / 6.0, 1.0)
         pygame.draw.rect(self.screen, DARK_PURPLE, (progress_x, progress_y, progress_width * time_percent, progress_height))
         pygame.draw.rect(self.screen, GRAY, (progress_x, progress_y, progress_width, progress_height), 1)
+        
+        # Search hint, while it is being worked out and then while it is fresh
+        hint = "thinking..." if self.hint_search is not None else self.hint
+        if hint is not None and (self.hint_search is not None or self.time_elapsed < self.hint_until):
+            self.mark_dirty("hint", HINT_RECT, hint)
+            hint_text = self.small_font.render(f"HINT: {hint}", True, DIM_YELLOW)
+            self.screen.blit(hint_text, hint_text.get_rect(center=HINT_RECT.center))
     
     def draw_game_over(self):
         """Draw game over screen with dark, scary atmosphere"""
@@ -502,56 +828,59 @@ class Game:
         restart_rect = restart.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100))
         self.screen.blit(restart, restart_rect)
     
-    def handle_input(self):
+    def handle_input(self, dt: float):
         """Handle keyboard input with independent toggle support"""
         keys = pygame.key.get_pressed()
         
         # Update individual cooldowns
         if self.left_door_cooldown > 0:
-            self.left_door_cooldown -= 1
+            self.left_door_cooldown -= dt
         if self.right_door_cooldown > 0:
-            self.right_door_cooldown -= 1
+            self.right_door_cooldown -= dt
         if self.left_light_cooldown > 0:
-            self.left_light_cooldown -= 1
+            self.left_light_cooldown -= dt
         if self.right_light_cooldown > 0:
-            self.right_light_cooldown -= 1
+            self.right_light_cooldown -= dt
         if self.camera_cooldown > 0:
-            self.camera_cooldown -= 1
+            self.camera_cooldown -= dt
+        
+        # Half a tick of slack so float drift never costs a whole extra tick
+        ready = dt / 2
         
         if self.state == GameState.PLAYING:
             # Left door - independent toggle
-            if keys[pygame.K_a] and self.left_door_cooldown <= 0:
-                self.left_door_closed = not self.left_door_closed
-                self.left_door_cooldown = 10
+            if keys[pygame.K_a] and self.left_door_cooldown < ready:
+                self.perform(Action.TOGGLE_LEFT_DOOR)
+                self.left_door_cooldown = TOGGLE_COOLDOWN
             
             # Right door - independent toggle
-            if keys[pygame.K_d] and self.right_door_cooldown <= 0:
-                self.right_door_closed = not self.right_door_closed
-                self.right_door_cooldown = 10
+            if keys[pygame.K_d] and self.right_door_cooldown < ready:
+                self.perform(Action.TOGGLE_RIGHT_DOOR)
+                self.right_door_cooldown = TOGGLE_COOLDOWN
             
             # Left light - independent toggle
-            if keys[pygame.K_q] and self.left_light_cooldown <= 0:
-                self.left_light_on = not self.left_light_on
-                self.left_light_cooldown = 10
+            if keys[pygame.K_q] and self.left_light_cooldown < ready:
+                self.perform(Action.TOGGLE_LEFT_LIGHT)
+                self.left_light_cooldown = TOGGLE_COOLDOWN
             
             # Right light - independent toggle
-            if keys[pygame.K_e] and self.right_light_cooldown <= 0:
-                self.right_light_on = not self.right_light_on
-                self.right_light_cooldown = 10
+            if keys[pygame.K_e] and self.right_light_cooldown < ready:
+                self.perform(Action.TOGGLE_RIGHT_LIGHT)
+                self.right_light_cooldown = TOGGLE_COOLDOWN
         
         elif self.state == GameState.CAMERA:
             # Camera switching with cooldown
-            if keys[pygame.K_LEFT] and self.camera_cooldown <= 0:
-                cam_list = list(Location)
+            if keys[pygame.K_LEFT] and self.camera_cooldown < ready:
+                cam_list = self.sim.graph.cameras
                 idx = cam_list.index(self.current_camera)
-                self.current_camera = cam_list[(idx - 1) % len(cam_list)]
-                self.camera_cooldown = 12
+                self.perform(Action.SELECT_CAMERA, cam_list[(idx - 1) % len(cam_list)].value)
+                self.camera_cooldown = CAMERA_SWITCH_COOLDOWN
             
-            elif keys[pygame.K_RIGHT] and self.camera_cooldown <= 0:
-                cam_list = list(Location)
+            elif keys[pygame.K_RIGHT] and self.camera_cooldown < ready:
+                cam_list = self.sim.graph.cameras
                 idx = cam_list.index(self.current_camera)
-                self.current_camera = cam_list[(idx + 1) % len(cam_list)]
-                self.camera_cooldown = 12
+                self.perform(Action.SELECT_CAMERA, cam_list[(idx + 1) % len(cam_list)].value)
+                self.camera_cooldown = CAMERA_SWITCH_COOLDOWN
     
     def handle_mouse_click(self, pos: tuple):
         """Handle mouse click events"""
@@ -561,57 +890,44 @@ class Game:
             # Click on start button area
             start_rect = pygame.Rect(SCREEN_WIDTH // 2 - 200, 380, 400, 40)
             if start_rect.collidepoint(x, y):
-                self.reset_game()
-                self.state = GameState.PLAYING
+                self.start_night()
         
         elif self.state == GameState.PLAYING:
             # Click on left door
             left_door_rect = pygame.Rect(50, 350, 100, 250)
             if left_door_rect.collidepoint(x, y):
-                self.left_door_closed = not self.left_door_closed
+                self.perform(Action.TOGGLE_LEFT_DOOR)
             
             # Click on right door
             right_door_rect = pygame.Rect(SCREEN_WIDTH - 150, 350, 100, 250)
             if right_door_rect.collidepoint(x, y):
-                self.right_door_closed = not self.right_door_closed
+                self.perform(Action.TOGGLE_RIGHT_DOOR)
             
             # Click on left light
             left_light_rect = pygame.Rect(70, 270, 60, 60)
             if left_light_rect.collidepoint(x, y):
-                self.left_light_on = not self.left_light_on
+                self.perform(Action.TOGGLE_LEFT_LIGHT)
             
             # Click on right light
             right_light_rect = pygame.Rect(SCREEN_WIDTH - 130, 270, 60, 60)
             if right_light_rect.collidepoint(x, y):
-                self.right_light_on = not self.right_light_on
+                self.perform(Action.TOGGLE_RIGHT_LIGHT)
             
             # Click to open camera
             camera_rect = pygame.Rect(SCREEN_WIDTH // 2 - 50, 20, 100, 30)
             if camera_rect.collidepoint(x, y):
-                self.camera_open = True
-                self.state = GameState.CAMERA
+                self.perform(Action.OPEN_CAMERA)
         
         elif self.state == GameState.CAMERA:
             # Click on camera selection buttons
-            cam_buttons = [
-                ("1-Stage", Location.STAGE, 150),
-                ("2-Dining", Location.DINING, 350),
-                ("3-Hallway", Location.HALLWAY, 550),
-                ("4-Left", Location.LEFT_DOOR, 750),
-                ("5-Right", Location.RIGHT_DOOR, 950)
-            ]
-            
-            cam_y = SCREEN_HEIGHT - 150
-            for label, loc, btn_x in cam_buttons:
-                btn_rect = pygame.Rect(btn_x - 50, cam_y - 10, 100, 30)
+            for label, loc, btn_rect in self.camera_buttons():
                 if btn_rect.collidepoint(x, y):
-                    self.current_camera = loc
+                    self.perform(Action.SELECT_CAMERA, loc.value)
             
             # Click to close camera
             close_rect = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT - 50, 300, 30)
             if close_rect.collidepoint(x, y):
-                self.camera_open = False
-                self.state = GameState.PLAYING
+                self.perform(Action.CLOSE_CAMERA)
         
         elif self.state in [GameState.GAME_OVER, GameState.WIN]:
             # Click to return to menu
@@ -619,69 +935,206 @@ class Game:
             if menu_rect.collidepoint(x, y):
                 self.state = GameState.MENU
     
-    def run(self):
-        """Main game loop"""
+    def poll_events(self) -> bool:
+        """Handle queued window events; returns False once the player quits"""
         running = True
-        
-        while running:
-            dt = self.clock.tick(FPS) / 1000.0
-            self.mouse_pos = pygame.mouse.get_pos()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:  # Left mouse button
+                    self.handle_mouse_click(event.pos)
             
-            # Event handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
                     running = False
                 
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  # Left mouse button
-                        self.handle_mouse_click(event.pos)
+                if event.key == PROFILER_TOGGLE_KEY and self.profiler is not None:
+                    self.profiler.overlay_visible = not self.profiler.overlay_visible
                 
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    
-                    if event.key == pygame.K_SPACE:
-                        if self.state == GameState.MENU:
-                            self.reset_game()
-                            self.state = GameState.PLAYING
-                        elif self.state == GameState.PLAYING:
-                            self.camera_open = True
-                            self.state = GameState.CAMERA
-                        elif self.state == GameState.CAMERA:
-                            self.camera_open = False
-                            self.state = GameState.PLAYING
-                        elif self.state in [GameState.GAME_OVER, GameState.WIN]:
-                            self.state = GameState.MENU
-            
-            # Update
-            self.handle_input()
-            
-            if self.state == GameState.PLAYING or self.state == GameState.CAMERA:
-                self.update_time(dt)
-                self.update_power(dt)
-                self.update_animatronics(dt)
-                self.check_power_out()
-            
-            if self.state == GameState.GAME_OVER and self.jumpscare_timer > 0:
-                self.jumpscare_timer -= dt
-            
-            # Draw
-            if self.state == GameState.MENU:
-                self.draw_menu()
-            elif self.state == GameState.PLAYING:
-                self.draw_office()
-            elif self.state == GameState.CAMERA:
-                self.draw_camera()
-            elif self.state == GameState.GAME_OVER:
-                self.draw_game_over()
-            elif self.state == GameState.WIN:
-                self.draw_win()
-            
-            pygame.display.flip()
+                if event.key == HINT_KEY and self.state in [GameState.PLAYING, GameState.CAMERA]:
+                    self.show_hint()
+                
+                if event.key == pygame.K_SPACE:
+                    if self.state == GameState.MENU:
+                        self.start_night()
+                    elif self.state == GameState.PLAYING:
+                        self.perform(Action.OPEN_CAMERA)
+                    elif self.state == GameState.CAMERA:
+                        self.perform(Action.CLOSE_CAMERA)
+                    elif self.state in [GameState.GAME_OVER, GameState.WIN]:
+                        self.state = GameState.MENU
+        return running
+    
+    def frame(self, frame_time: float) -> bool:
+        """One frame: input, the ticks owed for frame_time, drawing and presentation.
+
+        Returns False once the player quits.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_frame()
+        self.mouse_pos = pygame.mouse.get_pos()
+        
+        # Event handling
+        running = self.poll_events()
         
+        # Update
+        self.advance(frame_time)
+        self.update_hint()
+        
+        # Draw
+        if self.state == GameState.MENU:
+            self.draw_menu()
+        elif self.state == GameState.PLAYING:
+            self.draw_office()
+        elif self.state == GameState.CAMERA:
+            self.draw_camera()
+        elif self.state == GameState.GAME_OVER:
+            self.draw_game_over()
+        elif self.state == GameState.WIN:
+            self.draw_win()
+        self.draw_profiler()
+        
+        # State transitions and the jumpscare animation repaint everything
+        presented = (self.state, self.jumpscare_timer > 0)
+        self.present(full=presented != self.last_presented or self.jumpscare_timer > 0)
+        self.last_presented = presented
+        self.frames += 1
+        if profiler is not None:
+            profiler.end_frame()
+        return running
+    
+    def shutdown(self):
+        """Flush logs and profiler output and close the window"""
+        if self.checkpoint_path and self.state in (GameState.PLAYING, GameState.CAMERA):
+            self.write_checkpoint()
+        self.stop_recording()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.profiler is not None and self.profile_output:
+            self.profiler.export(self.profile_output)
         pygame.quit()
+    
+    def run(self):
+        """Main game loop"""
+        running = True
+        while running:
+            frame_time = self.clock.tick(self.fps) / 1000.0
+            # Raw time leaves out the cap's sleep: it is what the last frame cost
+            self.govern(self.clock.get_rawtime())
+            running = self.frame(frame_time)
+        self.shutdown()
         sys.exit()
+    
+    async def run_async(self, control: "ControlServer" = None):
+        """Main game loop as a coroutine, yielding to the event loop between frames.
+
+        Instead of sleeping inside Clock.tick, the time left in each frame's
+        budget is spent awaiting, so other tasks (such as a ControlServer's
+        clients) run in the gaps without delaying frames.
+        """
+        import asyncio  # deferred: only async runs pay for the import
+        if control is not None:
+            await control.start()
+        running = True
+        self.clock.tick()
+        try:
+            while running:
+                started = time.perf_counter()
+                # Uncapped tick: measures the frame without sleeping in it
+                running = self.frame(self.clock.tick() / 1000.0)
+                work = time.perf_counter() - started
+                self.govern(work * 1000.0)
+                budget = 1.0 / self.fps if self.fps else 0.0
+                await asyncio.sleep(max(0.0, budget - work))
+        finally:
+            if control is not None:
+                await control.close()
+            self.shutdown()
+
+def report_startup(game: Game):
+    """Draw and present the first frame, then print startup phases as JSON"""
+    started = time.perf_counter()
+    game.draw_menu()
+    game.present(full=True)
+    phases = dict(game.startup_phases, first_frame=time.perf_counter() - started)
+    report = {name: round(seconds * 1000, 3) for name, seconds in phases.items()}
+    report["total"] = round(sum(phases.values()) * 1000, 3)
+    print(json.dumps({"phases_ms": report}))
+    pygame.quit()
+
+def make_bot(name: str) -> "Policy":
+    """The --bot policy; arena is only imported when a bot plays"""
+    from arena import make_policy
+    return make_policy(name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Five Nights at Blankas")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="push only changed screen regions instead of full flips")
+    parser.add_argument("--noise-frames", type=int, default=NOISE_POOL_SIZE,
+                        help="pre-generated camera static frames to cycle through")
+    parser.add_argument("--noise-budget-mb", type=int, default=NOISE_MEMORY_BUDGET_MB,
+                        help="memory cap for the camera static pool")
+    parser.add_argument("--quality", choices=("auto",) + QUALITY_LEVELS, default="auto",
+                        help="render quality; auto steps it down when frames run over budget")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE,
+                        help="simulation ticks per second")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="render frame rate cap, 0 for uncapped")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each frame's subsystems; F3 shows the overlay")
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="on exit, write profiler samples as CSV, or Chrome trace JSON "
+                             "if PATH ends in .json (implies --profile)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print startup phase timings as JSON after the first frame and exit")
+    parser.add_argument("--difficulty", metavar="PATH",
+                        help="JSON or TOML balance definition for move and attack chances")
+    parser.add_argument("--bot", metavar="POLICY",
+                        help="let an automated policy play (arena.py name or module:Class)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="write a replayable log of every night to DIR")
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="stream per-night gameplay metrics to compressed JSONL files in DIR")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="autosave the running night to PATH every few night seconds and on quit")
+    parser.add_argument("--resume", metavar="PATH",
+                        help="continue from a checkpoint written by --checkpoint")
+    parser.add_argument("--async-loop", action="store_true",
+                        help="run the main loop under asyncio, yielding between frames")
+    control = parser.add_mutually_exclusive_group()
+    control.add_argument("--control-socket", metavar="PATH",
+                         help="serve the JSON-lines control endpoint on a Unix socket (implies --async-loop)")
+    control.add_argument("--control-port", type=int, metavar="PORT",
+                         help="serve the JSON-lines control endpoint on localhost (implies --async-loop)")
+    args = parser.parse_args(argv)
+    
+    game = Game(dirty_rects=args.dirty_rects, noise_pool_size=args.noise_frames,
+                noise_memory_budget_mb=args.noise_budget_mb, record_dir=args.record,
+                tick_rate=args.tick_rate, fps=args.fps,
+                profile=args.profile, profile_output=args.profile_output,
+                difficulty=load_difficulty_model(args.difficulty) if args.difficulty else None,
+                bot=make_bot(args.bot) if args.bot else None,
+                telemetry_dir=args.telemetry, checkpoint_path=args.checkpoint, quality=args.quality)
+    if args.resume:
+        with open(args.resume, "rb") as f:
+            game.load_snapshot(f.read())
+    if args.startup_report:
+        report_startup(game)
+        return
+    if args.control_socket or args.control_port is not None:
+        import asyncio
+        from control import ControlServer
+        server = ControlServer(game, path=args.control_socket, port=args.control_port)
+        asyncio.run(game.run_async(server))
+    elif args.async_loop:
+        import asyncio
+        asyncio.run(game.run_async())
+    else:
+        game.run()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+Exact Markov-chain solver for nights with fixed office controls.
+
+With the controls held fixed, power drain is deterministic and every
+animatronic moves independently of the others, so a night factorises into
+one small chain per animatronic. Each chain's state is (location, ticks
+left on the move timer) plus an absorbing "attacked" state; the fixed
+tick dt, the uniform timer resets, the retreat rule, the map's edge
+weights and the DifficultyModel tables give a sparse transition matrix
+per game hour. Propagating the state distribution tick by tick with
+sparse matrix-vector products yields survival probability, who kills
+you, and time-to-door distributions without sampling.
+
+Uses scipy.sparse when it is installed and a NumPy COO product otherwise.
+
+Usage:
+    python markov.py --right-door-closed [--dt 0.1] [--monte-carlo 20000] [--difficulty PATH]
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from class_function import (
+    Animatronic, DifficultyModel, DEFAULT_DIFFICULTY, LocationGraph, LOCATION_GRAPH,
+    NightSimulation, NIGHT_LENGTH, RETREAT_CHANCE, FINAL_HOUR, create_animatronics,
+    load_difficulty_model,
+)
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - exercised only without SciPy
+    sparse = None
+
+MOVED_TIMER = (3.0, 8.0)  # timer reset after a successful move roll
+STAYED_TIMER = (2.0, 5.0)  # timer reset after a failed one
+
+
+class _CooMatrix:
+    """Minimal COO operator used when SciPy is unavailable"""
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, data: np.ndarray, size: int):
+        self.rows, self.cols, self.data, self.size = rows, cols, data, size
+
+    def __matmul__(self, vector: np.ndarray) -> np.ndarray:
+        return np.bincount(self.rows, weights=self.data * vector[self.cols], minlength=self.size)
+
+
+Triples = Tuple[np.ndarray, np.ndarray, np.ndarray]  # from state, to state, probability
+
+
+def _operator(triples: Triples, size: int):
+    """Column-stochastic operator y = P^T x from (from, to, probability) triples"""
+    sources, targets, values = triples
+    if sparse is not None:
+        return sparse.csr_matrix((values, (targets, sources)), shape=(size, size))
+    return _CooMatrix(targets, sources, values, size)
+
+
+def timer_ticks(low: float, high: float, dt: float) -> np.ndarray:
+    """P(n) that a uniform(low, high) timer expires on the n-th tick, index n-1"""
+    n = np.arange(1, int(np.ceil(high / dt)) + 1)
+    overlap = np.minimum(high, n * dt) - np.maximum(low, (n - 1) * dt)
+    return np.clip(overlap, 0.0, None) / (high - low)
+
+
+def tick_hours(dt: float) -> List[int]:
+    """Game hour in effect on each tick, accumulated exactly as update_time does"""
+    hours = []
+    elapsed = 0.0
+    while True:
+        elapsed += dt
+        hour = int((elapsed / NIGHT_LENGTH) * 6)
+        hours.append(min(hour, FINAL_HOUR))
+        if hour >= FINAL_HOUR:
+            return hours
+
+
+@dataclass
+class MarkovResult:
+    """Exact outcome distribution of a night under fixed controls"""
+    dt: float
+    survival: float  # probability of reaching 6 AM
+    deaths: Dict[str, float]  # probability each animatronic gets you, power-out kills included
+    power_out: float  # probability of dying to the power running out
+    alive: np.ndarray  # P(still alive) after each tick
+    door_arrival: Dict[str, np.ndarray]  # per tick, P(first reaching a door on that tick)
+    solve_ms: float
+
+    def reach_door(self, name: str) -> float:
+        """Probability the animatronic reaches a door before 6 AM"""
+        return float(self.door_arrival[name].sum())
+
+    def mean_time_to_door(self, name: str) -> float:
+        """Expected seconds to first reach a door, given it does so before 6 AM"""
+        pmf = self.door_arrival[name]
+        total = pmf.sum()
+        if total == 0:
+            return float("nan")
+        return float((np.arange(1, len(pmf) + 1) * self.dt * pmf).sum() / total)
+
+
+class AnimatronicChain:
+    """Per-hour sparse transition operators for one animatronic under fixed doors.
+
+    States are location * timer_states + (ticks left - 1), followed by an
+    absorbing attacked state. With absorb_at_doors, arriving at a door is
+    absorbing instead, which turns the chain into a first-passage model.
+    """
+
+    def __init__(self, animatronic: Animatronic, graph: LocationGraph, difficulty: DifficultyModel,
+                 dt: float, left_door_closed: bool, right_door_closed: bool,
+                 absorb_at_doors: bool = False):
+        self.graph = graph
+        moved = timer_ticks(*MOVED_TIMER, dt)
+        stayed = timer_ticks(*STAYED_TIMER, dt)
+        self.timer_states = max(len(moved), len(stayed), int(np.ceil(animatronic.move_timer / dt)), 1)
+        self.size = len(graph) * self.timer_states + 1
+        self.sink = self.size - 1
+
+        move_table, attack_table = difficulty.tables_for(animatronic.name)
+        level = min(max(animatronic.ai_level, 0), difficulty.max_ai_level)
+        closed = {graph.left_door: left_door_closed, graph.right_door: right_door_closed}
+        self.transitions = [self._build(move_table[level][hour], attack_table[level][hour],
+                                        moved, stayed, closed, absorb_at_doors)
+                            for hour in range(FINAL_HOUR + 1)]
+
+        self.initial = np.zeros(self.size)
+        start = animatronic.location
+        if absorb_at_doors and start in graph.doors:
+            self.initial[self.sink] = 1.0
+        else:
+            ticks = max(int(np.ceil(animatronic.move_timer / dt - 1e-9)), 1)
+            self.initial[self.state(start, ticks)] = 1.0
+
+    def state(self, location, ticks_left):
+        return location.value * self.timer_states + ticks_left - 1
+
+    def successors(self, location) -> Dict[object, float]:
+        graph = self.graph
+        begin, end = graph.offsets[location.value], graph.offsets[location.value + 1]
+        weights = graph.weights[begin:end]
+        total = sum(weights)
+        result: Dict[object, float] = {}
+        for target, weight in zip(graph.targets[begin:end], weights):
+            loc = graph.locations[target]
+            result[loc] = result.get(loc, 0.0) + weight / total
+        return result
+
+    def _build(self, move_chance: float, attack_chance: float, moved: np.ndarray,
+               stayed: np.ndarray, closed: Dict[object, bool], absorb_at_doors: bool) -> Triples:
+        graph = self.graph
+        sink = self.sink
+        sources: List[np.ndarray] = [np.array([sink])]
+        targets: List[np.ndarray] = [np.array([sink])]
+        values: List[np.ndarray] = [np.ones(1)]
+
+        def add(source, target, probability):
+            target = np.atleast_1d(target)
+            sources.append(np.broadcast_to(source, target.shape))
+            targets.append(target)
+            values.append(np.broadcast_to(probability, target.shape))
+
+        def land(source: int, location, probability: float, timer: np.ndarray):
+            if probability <= 0:
+                return
+            if absorb_at_doors and location in graph.doors:
+                add(source, sink, probability)
+                return
+            ticks = np.nonzero(timer)[0]
+            add(source, self.state(location, ticks + 1), probability * timer[ticks])
+
+        countdown = np.arange(2, self.timer_states + 1)
+        for location in graph.locations:
+            # Counting down: ticks_left n -> n - 1
+            add(self.state(location, countdown), self.state(location, countdown - 1), 1.0)
+
+            # Timer expires this tick: roll to move, maybe retreat, maybe attack
+            source = self.state(location, 1)
+            land(source, location, 1.0 - move_chance, stayed)
+            at_door = location in closed
+            blocked = at_door and closed[location]
+            attack = attack_chance if at_door and not blocked and not absorb_at_doors else 0.0
+            if attack > 0:
+                add(source, sink, move_chance * attack)
+            survive = move_chance * (1.0 - attack)
+            if blocked:
+                retreat = graph.retreat.get(location, location)
+                land(source, retreat, survive * RETREAT_CHANCE, moved)
+                survive *= 1.0 - RETREAT_CHANCE
+            for target, probability in self.successors(location).items():
+                land(source, target, survive * probability, moved)
+        return (np.concatenate(sources).astype(np.intp), np.concatenate(targets).astype(np.intp),
+                np.concatenate(values).astype(np.float64))
+
+
+def absorbed_per_tick(chains: List[AnimatronicChain], hours: List[int]) -> np.ndarray:
+    """Probability mass entering each chain's absorbing state on each tick.
+
+    The chains are independent, so they are stacked block-diagonally and
+    advanced together with one sparse product per tick.
+    """
+    offsets = np.cumsum([0] + [chain.size for chain in chains])
+    size = int(offsets[-1])
+    operators = []
+    for hour in range(FINAL_HOUR + 1):
+        blocks = [chain.transitions[hour] for chain in chains]
+        triples = tuple(np.concatenate([block[part] + (offset if part < 2 else 0)
+                                        for block, offset in zip(blocks, offsets)])
+                        for part in range(3))
+        operators.append(_operator(triples, size))
+    sinks = offsets[:-1] + np.array([chain.sink for chain in chains], dtype=np.intp)
+
+    vector = np.concatenate([chain.initial for chain in chains])
+    absorbed = np.empty((len(chains), len(hours)))
+    previous = vector[sinks]
+    for tick, hour in enumerate(hours):
+        vector = operators[hour] @ vector
+        current = vector[sinks]
+        absorbed[:, tick] = current - previous
+        previous = current
+    return absorbed
+
+
+def solve_night(animatronics: Optional[List[Animatronic]] = None,
+                difficulty: DifficultyModel = DEFAULT_DIFFICULTY,
+                graph: LocationGraph = LOCATION_GRAPH, dt: float = 1 / 60,
+                left_door_closed: bool = False, right_door_closed: bool = False,
+                left_light_on: bool = False, right_light_on: bool = False,
+                camera_open: bool = False) -> MarkovResult:
+    """Outcome distribution of a night played with fixed controls on the fixed-step engine"""
+    started = time.perf_counter()
+    roster = animatronics if animatronics is not None else create_animatronics(graph)
+    names = [a.name for a in roster]
+    hours = tick_hours(dt)
+    ticks = len(hours)
+
+    # Fixed controls make the power-out tick deterministic
+    sim = NightSimulation([], graph=graph, difficulty=difficulty)
+    sim.left_door_closed, sim.right_door_closed = left_door_closed, right_door_closed
+    sim.left_light_on, sim.right_light_on = left_light_on, right_light_on
+    sim.camera_open = camera_open
+    power_out_tick = None
+    elapsed = 0.0
+    for tick in range(ticks):
+        elapsed += dt
+        if sim.power_model.power_at(elapsed) <= 0:
+            power_out_tick = tick
+            break
+
+    # One attack chain and one first-passage chain per active animatronic
+    active = [i for i, anim in enumerate(roster) if anim.active]
+    chains = []
+    for i in active:
+        for absorb_at_doors in (False, True):
+            chains.append(AnimatronicChain(roster[i], graph, difficulty, dt, left_door_closed,
+                                           right_door_closed, absorb_at_doors))
+    absorbed = absorbed_per_tick(chains, hours) if chains else np.zeros((0, ticks))
+
+    # Per-tick attack hazard of each animatronic, given it has not attacked yet
+    hazards = np.zeros((len(roster), ticks))
+    door_arrival = {name: np.zeros(ticks) for name in names}
+    for row, i in enumerate(active):
+        attacked = absorbed[2 * row]
+        not_yet = 1.0 - np.concatenate(([0.0], np.cumsum(attacked)[:-1]))
+        hazards[i] = np.divide(attacked, not_yet, out=np.zeros(ticks), where=not_yet > 0)
+        door_arrival[names[i]] = absorbed[2 * row + 1]
+
+    # Combine: the last attacker in roster order on a tick is credited, as in the engine
+    survive_tick = np.prod(1.0 - hazards, axis=0)
+    alive_before = np.concatenate(([1.0], np.cumprod(survive_tick)[:-1]))
+    deaths = {name: 0.0 for name in names}
+    for i, name in enumerate(names):
+        later_miss = np.prod(1.0 - hazards[i + 1:], axis=0) if i + 1 < len(names) else 1.0
+        credit = alive_before * hazards[i] * later_miss
+        if power_out_tick is not None:
+            credit = credit[:power_out_tick]
+        deaths[name] += float(credit.sum())
+
+    alive = alive_before * survive_tick
+    power_out = 0.0
+    if power_out_tick is not None:
+        # check_power_out runs last, so it overrides any attack on that tick
+        power_out = float(alive_before[power_out_tick])
+        alive[power_out_tick:] = 0.0
+        if names:
+            deaths[names[0]] += power_out
+    survival = float(alive[-1])
+
+    return MarkovResult(dt=dt, survival=survival, deaths=deaths, power_out=power_out,
+                        alive=alive, door_arrival=door_arrival,
+                        solve_ms=(time.perf_counter() - started) * 1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a fixed-control night exactly")
+    for control in ("left-door-closed", "right-door-closed", "left-light-on", "right-light-on",
+                    "camera-open"):
+        parser.add_argument(f"--{control}", action="store_true")
+    parser.add_argument("--dt", type=float, default=1 / 60,
+                        help="tick length; 1/60 matches the game, coarser solves faster")
+    parser.add_argument("--monte-carlo", type=int, default=0, metavar="N",
+                        help="also simulate N nights with the batch engine for comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--difficulty", metavar="PATH", help="JSON or TOML balance definition")
+    args = parser.parse_args(argv)
+    difficulty = load_difficulty_model(args.difficulty) if args.difficulty else DEFAULT_DIFFICULTY
+    controls = dict(left_door_closed=args.left_door_closed, right_door_closed=args.right_door_closed,
+                    left_light_on=args.left_light_on, right_light_on=args.right_light_on,
+                    camera_open=args.camera_open)
+
+    result = solve_night(difficulty=difficulty, dt=args.dt, **controls)
+    print(f"exact: survival {result.survival:.4%}, power-out {result.power_out:.4%} "
+          f"({result.solve_ms:.1f} ms, {'scipy.sparse' if sparse is not None else 'numpy'})")
+    for name, p in result.deaths.items():
+        print(f"  {name:<8} kills {p:.4%}, reaches a door {result.reach_door(name):.4%}, "
+              f"mean time to door {result.mean_time_to_door(name):.2f}s")
+
+    if args.monte_carlo:
+        from batch_simulation import simulate_nights
+        started = time.perf_counter()
+        batch = simulate_nights(args.monte_carlo, seed=args.seed, dt=args.dt,
+                                difficulty=difficulty, **controls)
+        elapsed = time.perf_counter() - started
+        stderr = (batch.win_rate * (1 - batch.win_rate) / batch.nights) ** 0.5
+        print(f"monte carlo: survival {batch.win_rate:.4%} +/- {1.96 * stderr:.4%} "
+              f"({batch.nights} nights, {elapsed * 1000:.0f} ms)")
+        for name, kills in batch.kills.items():
+            print(f"  {name:<8} kills {kills / batch.nights:.4%}")
+
+
+if __name__ == "__main__":
+    main()
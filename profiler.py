@@ -0,0 +1,211 @@
+"""
+Frame-time instrumentation for the game loop.
+Wraps chosen methods with perf_counter_ns timers, keeps rolling per-section
+frame totals for p50/p95/p99, draws an optional overlay graph and exports
+the raw samples as CSV or Chrome trace JSON (chrome://tracing, Perfetto).
+"""
+
+import csv
+import json
+from collections import deque
+from functools import wraps
+from time import perf_counter_ns
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import pygame
+
+FRAME = "frame"
+TARGET_FRAME_MS = 1000 / 60
+STATS_REFRESH_FRAMES = 30  # percentiles are re-sorted at most this often
+
+Sample = Tuple[int, str, int, int]  # frame index, section, start ns, end ns
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """Per-frame section timings with rolling percentiles and a bounded trace.
+
+    Call begin_frame() and end_frame() around each frame; time sections with
+    instrument() or the section() context manager. Each section's time is
+    summed per frame, so a method called once per simulation tick reports
+    its total cost for the frame.
+    """
+
+    def __init__(self, window: int = 600, trace_frames: int = 3600):
+        self.window = window
+        self.frame_index = 0
+        self.overlay_visible = False
+        self._frame_start = 0
+        self._samples: List[Sample] = []
+        self._totals: Dict[str, Deque[int]] = {}
+        # Raw samples of the last trace_frames frames, for export
+        self._trace: Deque[List[Sample]] = deque(maxlen=trace_frames)
+        self._stats_cache: Optional[Dict[str, Tuple[int, int, int]]] = None
+        self._stats_frame = 0
+
+    # ---- recording ----
+
+    def begin_frame(self):
+        self._samples = []
+        self._frame_start = perf_counter_ns()
+
+    def end_frame(self):
+        end = perf_counter_ns()
+        samples = self._samples
+        samples.append((self.frame_index, FRAME, self._frame_start, end))
+        frame_totals: Dict[str, int] = {}
+        for _, name, start, stop in samples:
+            frame_totals[name] = frame_totals.get(name, 0) + stop - start
+        for name, total in frame_totals.items():
+            totals = self._totals.get(name)
+            if totals is None:
+                totals = self._totals[name] = deque(maxlen=self.window)
+            totals.append(total)
+        self._trace.append(samples)
+        self.frame_index += 1
+
+    def record(self, name: str, start: int, end: int):
+        """Add one timed span to the current frame"""
+        self._samples.append((self.frame_index, name, start, end))
+
+    def section(self, name: str) -> "_Section":
+        """Context manager timing the enclosed block as section name"""
+        return _Section(self, name)
+
+    def instrument(self, obj: object, names: Iterable[str], prefix: str = ""):
+        """Replace obj's methods with timed wrappers on that instance only"""
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self._timed(method, prefix + name))
+
+    def _timed(self, method, label: str):
+        record = self.record
+        clock = perf_counter_ns
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(label, start, clock())
+        return timed
+
+    # ---- statistics ----
+
+    def sections(self) -> List[str]:
+        """Section names in first-seen order, the frame total first"""
+        return list(self._totals)
+
+    def frame_times_ms(self) -> List[float]:
+        """Rolling window of whole-frame times in milliseconds"""
+        return [ns / 1e6 for ns in self._totals.get(FRAME, ())]
+
+    def stats(self) -> Dict[str, Tuple[int, int, int]]:
+        """p50, p95 and p99 per section in nanoseconds over the rolling window"""
+        if self._stats_cache is None or self.frame_index - self._stats_frame >= STATS_REFRESH_FRAMES:
+            result = {}
+            for name, totals in self._totals.items():
+                ordered = sorted(totals)
+                result[name] = (percentile(ordered, 0.50), percentile(ordered, 0.95),
+                                percentile(ordered, 0.99))
+            self._stats_cache = result
+            self._stats_frame = self.frame_index
+        return self._stats_cache
+
+    # ---- export ----
+
+    def samples(self) -> Iterable[Sample]:
+        for frame in self._trace:
+            yield from frame
+
+    def export_csv(self, path: str):
+        """Write every retained span as frame, section, start_us, duration_us"""
+        with open(path, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(["frame", "section", "start_us", "duration_us"])
+            for frame, name, start, end in self.samples():
+                writer.writerow([frame, name, f"{start / 1000:.3f}", f"{(end - start) / 1000:.3f}"])
+
+    def export_chrome_trace(self, path: str):
+        """Write retained spans as Chrome trace complete events"""
+        events = [{"name": name, "cat": "frame" if name == FRAME else "game", "ph": "X",
+                   "ts": start / 1000, "dur": (end - start) / 1000, "pid": 1, "tid": 1,
+                   "args": {"frame": frame}}
+                  for frame, name, start, end in self.samples()]
+        with open(path, "w") as out:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, out)
+
+    def export(self, path: str):
+        """Export by extension: .json for Chrome trace, anything else as CSV"""
+        if path.endswith(".json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_csv(path)
+
+    # ---- overlay ----
+
+    def draw_overlay(self, surface: pygame.Surface, font, rect: pygame.Rect):
+        """Draw a frame-time graph and the per-section percentile table"""
+        panel = pygame.Surface(rect.size)
+        panel.set_alpha(210)
+        panel.fill((10, 10, 14))
+        surface.blit(panel, rect.topleft)
+        pygame.draw.rect(surface, (90, 90, 100), rect, 1)
+
+        # Frame-time graph: one column per frame, scaled so 2x budget fills it
+        graph = pygame.Rect(rect.x + 8, rect.y + 8, rect.width - 16, 60)
+        scale = graph.height / (2 * TARGET_FRAME_MS)
+        times = self.frame_times_ms()[-graph.width:]
+        for i, ms in enumerate(times):
+            height = min(graph.height, int(ms * scale))
+            color = (90, 170, 90) if ms <= TARGET_FRAME_MS else (200, 70, 60)
+            x = graph.right - len(times) + i
+            pygame.draw.line(surface, color, (x, graph.bottom), (x, graph.bottom - height))
+        budget_y = graph.bottom - int(TARGET_FRAME_MS * scale)
+        pygame.draw.line(surface, (160, 160, 80), (graph.x, budget_y), (graph.right, budget_y))
+
+        # Percentile table with right-aligned columns, so any font lines up
+        columns = (rect.x + 8, rect.right - 170, rect.right - 110, rect.right - 50)
+        y = graph.bottom + 6
+        rows = [("section", "p50", "p95", "p99 ms")]
+        rows += [(name, f"{p50 / 1e6:.2f}", f"{p95 / 1e6:.2f}", f"{p99 / 1e6:.2f}")
+                 for name, (p50, p95, p99) in self.stats().items()]
+        line_height = font.get_linesize()
+        for row_index, row in enumerate(rows):
+            if y + line_height > rect.bottom:
+                break
+            color = (170, 170, 180) if row_index == 0 else (210, 210, 215)
+            for column, (x, text) in enumerate(zip(columns, row)):
+                label = font.render(text, True, color)
+                if column == 0:
+                    surface.blit(label, (x, y))
+                else:
+                    surface.blit(label, (x + 40 - label.get_width(), y))
+            y += line_height
+
+
+class _Section:
+    """Timing block returned by FrameProfiler.section()"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: FrameProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, perf_counter_ns())
+        return False
@@ -0,0 +1,336 @@
+"""
+Rendering helpers for the FNAF-like game.
+Caches the parts of each screen that do not change between frames, and
+rendered text, so the draw methods in maingame only compose the dynamic
+elements. Cached surfaces are shared: blit them, never draw on them.
+QualityGovernor picks how much cosmetic detail fits in the frame budget.
+"""
+
+import random
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import pygame
+
+LayerBuilder = Callable[[pygame.Surface], None]
+Color = Tuple[int, int, int]
+
+OVERLAY_COLORKEY = (255, 0, 255)  # transparent colour for generated overlays
+
+# Quality governor tuning, in frames and fractions of the frame budget
+DOWNGRADE_WINDOW = 30  # frames whose median decides a step down
+UPGRADE_WINDOW = 120  # calm frames needed before trying a step up
+MAX_UPGRADE_WINDOW = 1920  # longest wait after repeatedly failed step ups
+DOWNGRADE_AT = 0.9  # step down when the median frame uses this much of the budget
+UPGRADE_AT = 0.6  # step up when the 90th percentile frame fits in this much
+
+
+class LayerCache:
+    """Pre-rendered static layers, one Surface per name, rebuilt on resolution change"""
+
+    def __init__(self):
+        self._layers: Dict[str, pygame.Surface] = {}
+        self._size: Optional[Tuple[int, int]] = None
+
+    def get(self, name: str, size: Tuple[int, int], builder: LayerBuilder,
+            colorkey: Optional[Tuple[int, int, int]] = None) -> pygame.Surface:
+        """Return the cached layer, building it with builder(surface) on first use.
+
+        With a colorkey the layer starts filled with that colour and is blitted
+        as a transparent overlay.
+        """
+        if size != self._size:
+            self._layers.clear()
+            self._size = size
+
+        layer = self._layers.get(name)
+        if layer is None:
+            layer = pygame.Surface(size).convert()
+            if colorkey is not None:
+                layer.fill(colorkey)
+                layer.set_colorkey(colorkey)
+            builder(layer)
+            self._layers[name] = layer
+        return layer
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one layer, or every layer when no name is given"""
+        if name is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(name, None)
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text keyed by (font, text, antialias, colour)"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color: Color) -> pygame.Surface:
+        """Return the rendered text, rasterizing it only on a cache miss"""
+        key = (font, text, antialias, color)
+        surface = self._entries.get(key)
+        if surface is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._entries[key] = surface
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return surface
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Drop every cached surface and reset the counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def load_font(path: Optional[str], size: int) -> pygame.font.Font:
+    """Load a font, initialising pygame's font module on first use"""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.Font(path, size)
+
+
+class CachedFont:
+    """Font wrapper whose render() goes through a shared TextCache.
+
+    Built with lazy(), the font file is only loaded the first time the font
+    is used, which keeps it off the startup path.
+    """
+
+    def __init__(self, font: Optional[pygame.font.Font], cache: TextCache,
+                 loader: Optional[Callable[[], pygame.font.Font]] = None):
+        self._font = font
+        self._loader = loader
+        self.cache = cache
+
+    @classmethod
+    def lazy(cls, path: Optional[str], size: int, cache: TextCache) -> "CachedFont":
+        return cls(None, cache, loader=lambda: load_font(path, size))
+
+    @property
+    def font(self) -> pygame.font.Font:
+        if self._font is None:
+            self._font = self._loader()
+        return self._font
+
+    def render(self, text: str, antialias: bool, color: Color) -> pygame.Surface:
+        return self.cache.render(self.font, text, antialias, color)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # size(), get_linesize() and friends go straight to the wrapped font
+        return getattr(self.font, name)
+
+
+class DirtyRectTracker:
+    """Collects the screen regions that changed since the last presented frame.
+
+    Draw routines report each dynamic region with a key describing what it
+    shows; a region is pushed only when its key differs from the previous
+    frame, or when it was reported last frame but not this one.
+    """
+
+    def __init__(self):
+        self._previous: Dict[str, Tuple[pygame.Rect, object]] = {}
+        self._current: Dict[str, Tuple[pygame.Rect, object]] = {}
+        self._always: List[pygame.Rect] = []
+        self._full = True
+
+    def mark(self, name: str, rect: pygame.Rect, key: object = None):
+        """Report a region that is dirty when its key changed since last frame"""
+        self._current[name] = (rect, key)
+
+    def mark_always(self, rect: pygame.Rect):
+        """Report a region that changes every frame, such as camera static"""
+        self._always.append(rect)
+
+    def request_full(self):
+        """Push the whole framebuffer on the next present"""
+        self._full = True
+
+    def dirty_rects(self) -> List[pygame.Rect]:
+        """Regions that need pushing for the frame drawn since the last present"""
+        rects = list(self._always)
+        previous = self._previous
+        for name, (rect, key) in self._current.items():
+            old = previous.get(name)
+            if old is None or old[1] != key:
+                rects.append(rect)
+        for name, (rect, _) in previous.items():
+            if name not in self._current:
+                rects.append(rect)
+        return rects
+
+    def present(self):
+        """Push the changed regions to the display and start a new frame"""
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        else:
+            rects = self.dirty_rects()
+            if rects:
+                pygame.display.update(rects)
+        self._previous = self._current
+        self._current = {}
+        self._always = []
+
+
+class CameraEffects:
+    """Pool of pre-generated CRT static and scanline overlays for the camera feed.
+
+    Each frame blits one pooled overlay instead of drawing dots and lines.
+    Frames are generated lazily, one per call until the pool is full, and the
+    pool never grows past memory_budget bytes. density scales the number of
+    dots and scanlines; fewer opaque runs make each overlay cheaper to blit.
+    """
+
+    def __init__(self, area: pygame.Rect, pool_size: int = 8, memory_budget: int = 32 * 1024 * 1024,
+                 dots: int = 80, noise_color: Color = (35, 90, 35),
+                 scanline_color: Color = (10, 25, 10), scanline_spacing: int = 3,
+                 seed: Optional[int] = None, density: float = 1.0):
+        # One pixel of margin so radius-1 dots on the feed edge are not clipped
+        self.area = pygame.Rect(area).inflate(2, 2)
+        self.pool_size = pool_size
+        self.memory_budget = memory_budget
+        self.dots = dots
+        self.noise_color = noise_color
+        self.scanline_color = scanline_color
+        self.scanline_spacing = scanline_spacing
+        self.density = density
+        self._rng = random.Random(seed)  # cosmetic noise never touches game randomness
+        self._frames: List[pygame.Surface] = []
+        self._index = 0
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.area.width * self.area.height * 4
+
+    @property
+    def capacity(self) -> int:
+        """Frames the pool holds, bounded by both pool_size and the memory budget"""
+        return max(1, min(self.pool_size, self.memory_budget // self.frame_bytes))
+
+    def _build_frame(self) -> pygame.Surface:
+        """Render one overlay of random static dots under the scanlines"""
+        width, height = self.area.size
+        frame = pygame.Surface((width, height)).convert()
+        frame.fill(OVERLAY_COLORKEY)
+
+        rng = self._rng
+        for _ in range(round(self.dots * self.density)):
+            x = rng.randint(1, width - 2)
+            y = rng.randint(1, height - 2)
+            pygame.draw.circle(frame, self.noise_color, (x, y), 1)
+
+        spacing = max(1, round(self.scanline_spacing / self.density))
+        for y in range(1, height - 1, spacing):
+            pygame.draw.line(frame, self.scanline_color, (1, y), (width - 2, y), 1)
+
+        frame.set_colorkey(OVERLAY_COLORKEY, pygame.RLEACCEL)
+        return frame
+
+    def warm(self):
+        """Generate the whole pool now, e.g. at startup"""
+        while len(self._frames) < self.capacity:
+            self._frames.append(self._build_frame())
+
+    def next_frame(self) -> pygame.Surface:
+        """Overlay for this frame, cycling through the pool"""
+        if len(self._frames) < self.capacity:
+            frame = self._build_frame()
+            self._frames.append(frame)
+            return frame
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        return frame
+
+    def draw(self, surface: pygame.Surface):
+        """Blit this frame's overlay onto the camera feed"""
+        surface.blit(self.next_frame(), self.area.topleft)
+
+    def set_density(self, density: float):
+        """Change the effect density; the pool is regenerated lazily at the new one"""
+        if density != self.density:
+            self.density = density
+            self.clear()
+
+    def clear(self):
+        """Release every pooled frame"""
+        self._frames.clear()
+        self._index = 0
+
+
+class QualityGovernor:
+    """Picks a render quality level that keeps frames inside their time budget.
+
+    Level 0 is full quality and each higher level is cheaper to draw. Feed
+    observe() every frame's work time, excluding any frame-cap sleep. The
+    governor steps down when the median of the last DOWNGRADE_WINDOW frames
+    is close to the budget, so a single hitch never costs quality, and steps
+    back up after a longer run of frames with clear headroom. A step up that
+    is undone before its level has held for a full window doubles the wait
+    before the next attempt, so a machine on the edge backs off instead of
+    oscillating.
+    """
+
+    def __init__(self, budget_ms: float, levels: int, level: int = 0):
+        self.budget_ms = budget_ms
+        self.levels = levels
+        self.level = level
+        self.changes = 0
+        self.upgrade_window = UPGRADE_WINDOW
+        self._samples: Deque[float] = deque(maxlen=MAX_UPGRADE_WINDOW)
+        self._probing = False  # the current level came from a step up that has not yet held
+
+    def observe(self, frame_ms: float) -> bool:
+        """Record one frame's work time; True when the level changed"""
+        samples = self._samples
+        samples.append(frame_ms)
+        if len(samples) >= DOWNGRADE_WINDOW and self.level < self.levels - 1:
+            recent = sorted(samples[i] for i in range(-DOWNGRADE_WINDOW, 0))
+            if recent[DOWNGRADE_WINDOW // 2] > self.budget_ms * DOWNGRADE_AT:
+                if self._probing:
+                    self.upgrade_window = min(self.upgrade_window * 2, MAX_UPGRADE_WINDOW)
+                self._probing = False
+                return self._change(self.level + 1)
+
+        if len(samples) >= self.upgrade_window:
+            if self._probing:
+                # The last step up held for a full window: later ones need not wait longer
+                self._probing = False
+                self.upgrade_window = UPGRADE_WINDOW
+            if self.level > 0:
+                slow = sorted(samples)[int(len(samples) * 0.9)]
+                if slow < self.budget_ms * UPGRADE_AT:
+                    self._probing = True
+                    return self._change(self.level - 1)
+            # Slide the window a downgrade window at a time rather than re-sorting every frame
+            for _ in range(DOWNGRADE_WINDOW):
+                samples.popleft()
+        return False
+
+    def _change(self, level: int) -> bool:
+        # Frames measured at the old level say nothing about the new one
+        self.level = level
+        self.changes += 1
+        self._samples.clear()
+        return True
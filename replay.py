@@ -0,0 +1,256 @@
+"""
+Deterministic record/replay of nights.
+
+A night log holds the RNG seed, every tick's dt and every player action in
+a compact binary stream, so a recorded night can be re-run headlessly at
+full speed and checked bit for bit against the recorded final state.
+
+Log layout: a "<4sBQI" header (magic, version, seed, definition length),
+the balance definition of the night's difficulty model as UTF-8 JSON (empty
+for the built-in model), then unsigned LEB128 varints. Each varint's low two bits give the record kind:
+    RUN     n ticks at the current dt with no actions in between
+    DT      zigzag delta of the tick length in microseconds
+    ACTION  Action value, followed by a varint of (argument + 1), 0 for none
+    END     followed by a "<Qb" trailer (state checksum, outcome code)
+
+Usage:
+    python replay.py night.fnr [--verify]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import time
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from class_function import (Action, DEFAULT_DIFFICULTY, DifficultyModel, GameState,
+                            NightSimulation)
+
+MAGIC = b"FNBR"
+VERSION = 2
+PREAMBLE = struct.Struct("<4sB")  # magic and version, common to every log version
+HEADER = struct.Struct("<4sBQI")
+HEADER_V1 = struct.Struct("<4sBQ")  # version 1 logs: no difficulty model, always the built-in one
+TRAILER = struct.Struct("<Qb")
+
+RECORD_RUN = 0
+RECORD_DT = 1
+RECORD_ACTION = 2
+RECORD_END = 3
+
+DT_RESOLUTION = 1_000_000  # dt is quantized to whole microseconds
+
+OUTCOME_CODES = {None: 0, GameState.WIN: 1, GameState.GAME_OVER: 2}
+
+
+# ============= ENCODING =============
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def quantize_dt(dt: float) -> int:
+    """Tick length in whole microseconds, as stored in the log"""
+    return round(dt * DT_RESOLUTION)
+
+
+def state_checksum(sim: NightSimulation) -> int:
+    """64-bit digest of the full simulation state, RNG included"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(struct.pack(
+        "<ddi5?ib", sim.time_elapsed, sim.power, sim.game_hour,
+        sim.left_door_closed, sim.right_door_closed, sim.left_light_on,
+        sim.right_light_on, sim.camera_open, sim.current_camera.value,
+        OUTCOME_CODES[sim.outcome]))
+    for anim in sim.animatronics:
+        digest.update(struct.pack("<idi?", anim.location.value, anim.move_timer,
+                                  anim.ai_level, anim.active))
+    _, internal, _ = sim.rng.getstate()
+    digest.update(struct.pack(f"<{len(internal)}I", *internal))
+    return int.from_bytes(digest.digest(), "little")
+
+
+# ============= RECORDING =============
+
+def _encode_difficulty(difficulty: Optional[DifficultyModel]) -> bytes:
+    if difficulty is None or difficulty is DEFAULT_DIFFICULTY:
+        return b""
+    if difficulty.config is None:
+        raise ValueError("only difficulty models built from a balance definition can be recorded")
+    return json.dumps(difficulty.config, sort_keys=True, separators=(",", ":")).encode()
+
+
+class NightRecorder:
+    """Writes one night's seed, difficulty, ticks and actions to a binary log"""
+
+    def __init__(self, out: BinaryIO, seed: int, difficulty: Optional[DifficultyModel] = None):
+        definition = _encode_difficulty(difficulty)
+        self._out = out
+        self._buffer = bytearray(HEADER.pack(MAGIC, VERSION, seed, len(definition)) + definition)
+        self._dt_us = 0
+        self._run = 0
+        self.closed = False
+
+    @classmethod
+    def create(cls, directory: str, seed: int,
+               difficulty: Optional[DifficultyModel] = None) -> "NightRecorder":
+        """Start a log file named after the seed in the given directory"""
+        _encode_difficulty(difficulty)  # refuse before creating the file
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("night-%Y%m%d-%H%M%S") + f"-{seed:016x}.fnr"
+        return cls(open(os.path.join(directory, name), "wb"), seed, difficulty)
+
+    def _flush_run(self):
+        if self._run:
+            _write_varint(self._buffer, self._run << 2 | RECORD_RUN)
+            self._run = 0
+
+    def record_action(self, action: Action, arg: Optional[int] = None):
+        """Log an action applied before the next tick"""
+        if self.closed:
+            return
+        self._flush_run()
+        _write_varint(self._buffer, action.value << 2 | RECORD_ACTION)
+        _write_varint(self._buffer, 0 if arg is None else arg + 1)
+
+    def tick(self, dt: float) -> float:
+        """Log a tick and return the quantized dt the simulation must step by"""
+        dt_us = quantize_dt(dt)
+        if self.closed:
+            return dt_us / DT_RESOLUTION
+        if dt_us != self._dt_us:
+            self._flush_run()
+            _write_varint(self._buffer, _zigzag(dt_us - self._dt_us) << 2 | RECORD_DT)
+            self._dt_us = dt_us
+        self._run += 1
+        return dt_us / DT_RESOLUTION
+
+    def finish(self, sim: NightSimulation):
+        """Write the final-state checksum and close the log"""
+        if self.closed:
+            return
+        self._flush_run()
+        _write_varint(self._buffer, RECORD_END)
+        self._buffer += TRAILER.pack(state_checksum(sim), OUTCOME_CODES[sim.outcome])
+        self._out.write(self._buffer)
+        self._out.close()
+        self.closed = True
+
+
+# ============= REPLAY =============
+
+def read_log(data: bytes) -> Tuple[int, DifficultyModel, Iterator[tuple], list]:
+    """Parse a log into (seed, difficulty model, records, trailer holder).
+
+    Records are ("tick", dt, count) or ("action", Action, arg). The trailer
+    holder list receives (checksum, outcome_code) once END is reached.
+    """
+    magic, version = PREAMBLE.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a night log")
+    difficulty = DEFAULT_DIFFICULTY
+    if version == VERSION:
+        _, _, seed, length = HEADER.unpack_from(data, 0)
+        start = HEADER.size + length
+        if length:
+            difficulty = DifficultyModel.from_config(json.loads(data[HEADER.size:start]))
+    elif version == 1:
+        _, _, seed = HEADER_V1.unpack_from(data, 0)
+        start = HEADER_V1.size
+    else:
+        raise ValueError(f"unsupported night log version {version}")
+    trailer: list = []
+
+    def records() -> Iterator[tuple]:
+        pos = start
+        dt_us = 0
+        while pos < len(data):
+            value, pos = _read_varint(data, pos)
+            kind, payload = value & 3, value >> 2
+            if kind == RECORD_RUN:
+                yield ("tick", dt_us / DT_RESOLUTION, payload)
+            elif kind == RECORD_DT:
+                dt_us += _unzigzag(payload)
+            elif kind == RECORD_ACTION:
+                arg, pos = _read_varint(data, pos)
+                yield ("action", Action(payload), arg - 1 if arg else None)
+            else:
+                trailer.extend(TRAILER.unpack_from(data, pos))
+                return
+
+    return seed, difficulty, records(), trailer
+
+
+def replay(data: bytes) -> Tuple[NightSimulation, Optional[Tuple[int, int]], int]:
+    """Re-run a logged night headlessly; returns (sim, recorded trailer, ticks)"""
+    seed, difficulty, records, trailer = read_log(data)
+    sim = NightSimulation(rng=random.Random(seed), difficulty=difficulty)
+    ticks = 0
+    step = sim.step
+    for record in records:
+        if record[0] == "tick":
+            _, dt, count = record
+            for _ in range(count):
+                step(dt)
+            ticks += count
+        else:
+            sim.apply(record[1], record[2])
+    return sim, tuple(trailer) if trailer else None, ticks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded night headlessly")
+    parser.add_argument("log", help="night log written by maingame.py --record")
+    parser.add_argument("--verify", action="store_true",
+                        help="fail unless the final state matches the recorded checksum")
+    args = parser.parse_args(argv)
+
+    with open(args.log, "rb") as f:
+        data = f.read()
+    start = time.perf_counter()
+    sim, trailer, ticks = replay(data)
+    elapsed = time.perf_counter() - start
+
+    checksum = state_checksum(sim)
+    outcome = sim.outcome.name if sim.outcome else "UNFINISHED"
+    print(f"{args.log}: {outcome} at {sim.time_elapsed:.3f}s, power {sim.power:.3f}%, "
+          f"{ticks} ticks in {elapsed:.3f}s, checksum {checksum:016x}")
+
+    if args.verify:
+        if trailer is None:
+            print("no recorded checksum (log was not finished)")
+            sys.exit(1)
+        if trailer[0] != checksum:
+            print(f"MISMATCH: recorded checksum {trailer[0]:016x}")
+            sys.exit(1)
+        print("checksum OK")
+
+
+if __name__ == "__main__":
+    main()
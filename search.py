@@ -0,0 +1,450 @@
+"""
+Monte Carlo tree search player, difficulty oracle and hint engine.
+
+At each decision the searcher snapshots the night and grows an open-loop
+UCT tree over the office controls: every iteration restores the snapshot
+with a fresh RNG, replays the tree's moves with each held for SEARCH_STEP
+night seconds on the fixed-step engine, then finishes the night on the
+event scheduler under a reflex policy that keeps a door shut exactly
+while someone stands at it. A rollout scores 1 for reaching 6 AM plus a
+bonus for power left, so among safe moves the cheaper one wins, and the
+n-th rollout of every root move shares a seed so moves are compared on
+the same futures.
+
+As a policy the search sees the full night state, not just the player's
+view, so its survival rate is an upper bound on what a player can reach:
+a difficulty oracle. Root statistics are cached by a coarse state key and
+seed the next search from a matching state, which at a decision every
+0.1 s is most of them. With workers > 1 each decision is searched
+root-parallel across processes and the root statistics are summed.
+
+Hints are fair instead: a Belief built from the player's observations
+determinizes every rollout, placing the animatronics out of sight where
+the player might expect them rather than where they are.
+
+A search stops at its time budget or, when given one, after a fixed number
+of iterations; only the latter repeats exactly from run to run.
+
+Usage:
+    python search.py [--nights 20] [--budget 0.02 | --iterations N] [--workers 1]
+                     [--difficulty PATH]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from arena import ArenaResult, Decision, Policy, night_seed, play_night, print_results
+from belief import Belief
+from class_function import (Action, DifficultyModel, GameState, Location,
+                            LOCATION_GRAPH, NightSimulation, Observation, load_difficulty_model)
+from snapshot import NightSnapshot
+
+SEARCH_BUDGET = 0.02  # seconds of search per decision
+SEARCH_STEP = 1.0  # night seconds each tree move is held before the next one
+SEARCH_DEPTH = 3  # tree moves per iteration before the rollout takes over
+STEP_DT = 0.1  # fixed step used while replaying tree moves
+EXPLORATION = 0.7  # UCT exploration constant; values lie in [0, 1 + POWER_WEIGHT]
+POWER_WEIGHT = 0.5  # value of a full battery at 6 AM, on top of 1 for surviving
+HOLD_MARGIN = 0.002  # a move must beat holding steady by this much mean value
+PRIOR_VISITS = 32  # cached root statistics count as at most this many visits
+TABLE_SIZE = 100_000  # transposition table entries kept, least recently used dropped
+TIME_BUCKET = 2.0  # night seconds per transposition key bucket
+POWER_BUCKET = 2.0  # power per transposition key bucket
+
+# Tree moves: keep the controls, toggle one, or raise/lower the monitor
+HOLD = 0
+MOVES: Tuple[Optional[Action], ...] = (None, Action.TOGGLE_LEFT_DOOR, Action.TOGGLE_RIGHT_DOOR,
+                                       Action.TOGGLE_LEFT_LIGHT, Action.TOGGLE_RIGHT_LIGHT,
+                                       Action.OPEN_CAMERA)
+CAMERA_MOVE = len(MOVES) - 1
+
+Stats = List[List[float]]  # per move: [visits, summed value, survived rollouts]
+
+
+def move_actions(sim: NightSimulation, move: int) -> List[Decision]:
+    """The player actions a tree move stands for in the given state"""
+    action = MOVES[move]
+    if action is None:
+        return []
+    if move == CAMERA_MOVE and sim.camera_open:
+        action = Action.CLOSE_CAMERA
+    return [(action, None)]
+
+
+def describe(sim: NightSimulation, move: int) -> str:
+    """A move as advice to the player"""
+    if move == HOLD:
+        return "hold steady"
+    if move == CAMERA_MOVE:
+        return "put the monitor down" if sim.camera_open else "check the cameras"
+    side = "left" if move in (1, 3) else "right"
+    if move in (1, 2):
+        closed = sim.left_door_closed if side == "left" else sim.right_door_closed
+        return f"{'open' if closed else 'close'} the {side} door"
+    lit = sim.left_light_on if side == "left" else sim.right_light_on
+    return f"turn the {side} light {'off' if lit else 'on'}"
+
+
+def state_key(sim: NightSimulation) -> tuple:
+    """Coarse transposition key: nearby times and power levels share statistics"""
+    return (int(sim.time_elapsed // TIME_BUCKET), int(sim.power // POWER_BUCKET),
+            sim.left_door_closed, sim.right_door_closed, sim.left_light_on,
+            sim.right_light_on, sim.camera_open,
+            tuple(anim.location.value for anim in sim.animatronics))
+
+
+# ============= SEARCH =============
+
+def reflex(sim: NightSimulation):
+    """Rollout policy: lights and monitor off, each door shut only while occupied"""
+    graph = sim.graph
+    occupied = sim.animatronics.occupied
+    left, right = occupied(graph.left_door), occupied(graph.right_door)
+    if sim.left_door_closed != left:
+        sim.left_door_closed = left
+    if sim.right_door_closed != right:
+        sim.right_door_closed = right
+
+
+def rollout(sim: NightSimulation) -> Tuple[bool, float]:
+    """Finish the night under the reflex policy; returns (survived, value)"""
+    if sim.outcome is None:
+        sim.left_light_on = sim.right_light_on = sim.camera_open = False
+        reflex(sim)
+        sim.run_events(reflex)
+    if sim.outcome == GameState.WIN:
+        return True, 1.0 + POWER_WEIGHT * sim.power / 100
+    return False, 0.0
+
+
+class _Node:
+    """Open-loop tree node: statistics for a sequence of moves, not a state"""
+
+    __slots__ = ("visits", "total", "wins", "children")
+
+    def __init__(self, visits: float = 0.0, total: float = 0.0, wins: float = 0.0):
+        self.visits = visits
+        self.total = total
+        self.wins = wins
+        self.children: Optional[List["_Node"]] = None
+
+    def select(self) -> int:
+        children = self.children
+        log_visits = math.log(max(self.visits, 1.0))
+        best, best_score = 0, -1.0
+        for move, child in enumerate(children):
+            if child.visits == 0:
+                return move
+            score = child.total / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = move, score
+        return best
+
+
+class RootSearch:
+    """Open-loop UCT tree over one snapshot, grown over as many run() calls as needed.
+
+    With a belief, every iteration determinizes the restored night first.
+    """
+
+    def __init__(self, snapshot: NightSnapshot, seed: int, priors: Optional[Stats] = None,
+                 difficulty: Optional[DifficultyModel] = None, graph=LOCATION_GRAPH,
+                 belief: Optional[Belief] = None):
+        self.snapshot = snapshot
+        self.difficulty = difficulty
+        self.graph = graph
+        self.belief = belief
+        self.root = _Node()
+        self.root.children = [_Node(*stats) for stats in priors] if priors else [_Node() for _ in MOVES]
+        self.root.visits = sum(child.visits for child in self.root.children)
+        self.iterations = 0
+        self._rng = random.Random(seed)
+        # Common random numbers: the n-th rollout of every root move replays the
+        # same seed, so moves are compared on the same futures rather than on luck
+        self._seeds: List[int] = []
+        self._rollouts = [0] * len(MOVES)
+
+    def run(self, deadline: float = math.inf, max_iterations: Optional[int] = None) -> int:
+        """Iterate until deadline or max_iterations more, whichever comes first; returns iterations run.
+
+        At least one iteration runs whatever the deadline.
+        """
+        root = self.root
+        seeds = self._seeds
+        rollouts = self._rollouts
+        clock = time.perf_counter
+        steps = max(1, round(SEARCH_STEP / STEP_DT))
+        iterations = 0
+        while max_iterations is None or iterations < max_iterations:
+            if iterations and clock() >= deadline:
+                break
+            move = root.select()
+            n = rollouts[move]
+            rollouts[move] += 1
+            if n == len(seeds):
+                seeds.append(self._rng.getrandbits(64))
+            future = random.Random(seeds[n])
+            sim = self.snapshot.restore(self.graph, self.difficulty, future)
+            if self.belief is not None:
+                self.belief.determinize(sim, future)
+            node = root
+            path = [root]
+            for depth in range(1, SEARCH_DEPTH + 1):
+                for action, arg in move_actions(sim, move):
+                    sim.apply(action, arg)
+                for _ in range(steps):
+                    sim.step(STEP_DT)
+                    if sim.outcome is not None:
+                        break
+                node = node.children[move]
+                path.append(node)
+                if node.visits == 0 or depth == SEARCH_DEPTH or sim.outcome is not None:
+                    break
+                if node.children is None:
+                    node.children = [_Node() for _ in MOVES]
+                move = node.select()
+            won, value = rollout(sim)
+            for visited in path:
+                visited.visits += 1
+                visited.total += value
+                visited.wins += won
+            iterations += 1
+        self.iterations += iterations
+        return iterations
+
+    def stats(self) -> Stats:
+        return [[child.visits, child.total, child.wins] for child in self.root.children]
+
+
+def search_root(snapshot: NightSnapshot, deadline: float, seed: int,
+                priors: Optional[Stats] = None, difficulty: Optional[DifficultyModel] = None,
+                graph=LOCATION_GRAPH, max_iterations: Optional[int] = None,
+                belief: Optional[Belief] = None) -> Tuple[Stats, int]:
+    """UCT from a snapshot until deadline, or for exactly max_iterations when given.
+
+    Returns the root move statistics and the iterations run.
+    """
+    if max_iterations is not None:
+        deadline = math.inf
+    search = RootSearch(snapshot, seed, priors, difficulty, graph, belief)
+    search.run(deadline, max_iterations)
+    return search.stats(), search.iterations
+
+
+def _search_task(args) -> Tuple[Stats, int]:
+    """Worker entry point: search a snapshot blob for budget seconds or a set number of iterations"""
+    blob, budget, iterations, seed, priors, difficulty = args
+    deadline = time.perf_counter() + budget
+    return search_root(NightSnapshot.from_bytes(blob), deadline, seed, priors, difficulty,
+                       max_iterations=iterations)
+
+
+@dataclass
+class SearchResult:
+    """Root statistics of one decision"""
+    best: int
+    visits: List[float]
+    values: List[float]  # mean rollout value per move, nan when unvisited
+    survival: List[float]  # share of rollouts reaching 6 AM per move, nan when unvisited
+    iterations: int
+    cache_hit: bool
+    elapsed: float
+
+
+def rank(stats: Stats, iterations: int, cache_hit: bool = False, elapsed: float = 0.0) -> SearchResult:
+    """Pick the best root move from its statistics"""
+    visits = [s[0] for s in stats]
+    values = [s[1] / s[0] if s[0] else float("nan") for s in stats]
+    survival = [s[2] / s[0] if s[0] else float("nan") for s in stats]
+    visited = [move for move in range(len(MOVES)) if visits[move]]
+    best = max(visited, key=lambda move: values[move])
+    # Near-ties are noise: only leave the controls alone unless clearly better
+    if visits[HOLD] and values[best] < values[HOLD] + HOLD_MARGIN:
+        best = HOLD
+    return SearchResult(best, visits, values, survival, iterations, cache_hit, elapsed)
+
+
+class SearchPlayer:
+    """MCTS over the office controls with a transposition table and optional process pool.
+
+    iterations, when given, replaces the time budget with a fixed number of
+    iterations per decision (split across workers), so that results repeat.
+    """
+
+    def __init__(self, budget: float = SEARCH_BUDGET, workers: int = 1, seed: int = 0,
+                 iterations: Optional[int] = None):
+        self.budget = budget
+        self.iterations = iterations
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.table: "OrderedDict[tuple, Stats]" = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def recommend(self, sim: NightSimulation, belief: Optional[Belief] = None) -> SearchResult:
+        """Search a night and rank the moves.
+
+        Without a belief the search reads the full state. With one it only
+        uses what the belief allows and runs in this process, bypassing the
+        transposition table, whose keys hold the true positions.
+        """
+        started = time.perf_counter()
+        snapshot = NightSnapshot.capture(sim)
+        key = state_key(sim) if belief is None else None
+        priors = self._priors(key) if key is not None else None
+        if belief is not None:
+            belief.prepare(sim)
+
+        if self.workers > 1 and sim.graph is LOCATION_GRAPH and belief is None:
+            # Workers rebuild the default map themselves, so only it is searched in parallel
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            blob = snapshot.to_bytes()
+            share = -(-self.iterations // self.workers) if self.iterations else None
+            tasks = [(blob, self.budget, share, self.rng.getrandbits(64), priors, sim.difficulty)
+                     for _ in range(self.workers)]
+            stats = [[0.0, 0.0, 0.0] for _ in MOVES]
+            iterations = 0
+            for worker_stats, worker_iterations in self._pool.map(_search_task, tasks):
+                iterations += worker_iterations
+                for total, part in zip(stats, worker_stats):
+                    for field, value in enumerate(part):
+                        total[field] += value
+            if priors:
+                # Every worker started from the same priors; count them once
+                for total, prior in zip(stats, priors):
+                    for field, value in enumerate(prior):
+                        total[field] -= value * (self.workers - 1)
+        else:
+            stats, iterations = search_root(snapshot, started + self.budget, self.rng.getrandbits(64),
+                                            priors, sim.difficulty, sim.graph,
+                                            self.iterations, belief)
+
+        if key is not None:
+            self._store(key, stats)
+        return rank(stats, iterations, priors is not None, time.perf_counter() - started)
+
+    def _priors(self, key: tuple) -> Optional[Stats]:
+        self.lookups += 1
+        cached = self.table.get(key)
+        if cached is None:
+            return None
+        self.hits += 1
+        self.table.move_to_end(key)
+        # Scale down so fresh rollouts can still overturn old conclusions
+        total = sum(stats[0] for stats in cached)
+        scale = min(1.0, PRIOR_VISITS / total) if total else 1.0
+        return [[field * scale for field in stats] for stats in cached]
+
+    def _store(self, key: tuple, stats: Stats):
+        self.table[key] = stats
+        self.table.move_to_end(key)
+        if len(self.table) > TABLE_SIZE:
+            self.table.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# ============= HINTS =============
+
+class HintSearch:
+    """Advice from what the player could know, searched a slice at a time.
+
+    The night and the player's belief are both frozen when the hint is asked
+    for, so the game can go on observing while the search runs; each step()
+    grows the search for a slice of the frame budget, so no frame waits for
+    the whole search. The text is ready once every iteration has run.
+    """
+
+    def __init__(self, sim: NightSimulation, belief: Belief, iterations: int, seed: int):
+        belief.observe(sim.observe())
+        self.belief = belief.copy()
+        self.belief.prepare(sim)
+        self.snapshot = NightSnapshot.capture(sim)
+        self.iterations = iterations
+        self.search = RootSearch(self.snapshot, seed, None, sim.difficulty, sim.graph, self.belief)
+        self.text: Optional[str] = None
+
+    def step(self, budget: float) -> Optional[str]:
+        """Search for up to budget seconds; returns the hint once it is complete"""
+        if self.text is None:
+            search = self.search
+            search.run(time.perf_counter() + budget, self.iterations - search.iterations)
+            if search.iterations >= self.iterations:
+                result = rank(search.stats(), search.iterations)
+                # Described against the controls as they were when the hint was asked for
+                asked = self.snapshot.restore(search.graph, search.difficulty)
+                self.text = f"{describe(asked, result.best)} ({result.survival[result.best]:.0%} to survive)"
+        return self.text
+
+
+# ============= POLICY =============
+
+class SearchPolicy(Policy):
+    """Arena and --bot policy driven by SearchPlayer; an oracle, it reads the whole night"""
+
+    def __init__(self, budget: float = SEARCH_BUDGET, workers: int = 1,
+                 iterations: Optional[int] = None):
+        self.player = SearchPlayer(budget, workers, iterations=iterations)
+        self.sim: Optional[NightSimulation] = None
+
+    def bind(self, sim: NightSimulation):
+        self.sim = sim
+
+    def reset(self, rng: random.Random):
+        super().reset(rng)
+        self.player.rng = random.Random(rng.getrandbits(64))
+
+    def act(self, observation: Observation) -> List[Decision]:
+        if self.sim is None:
+            raise RuntimeError("SearchPolicy needs bind(sim) before it can act")
+        return move_actions(self.sim, self.player.recommend(self.sim).best)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Play nights with the MCTS oracle")
+    parser.add_argument("--nights", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=SEARCH_BUDGET, help="seconds per decision")
+    parser.add_argument("--iterations", type=int,
+                        help="fixed iterations per decision instead of --budget; results repeat exactly")
+    parser.add_argument("--workers", type=int, default=1, help="rollout processes per decision")
+    parser.add_argument("--seed", type=int, default=0, help="master seed, as in arena.py")
+    parser.add_argument("--difficulty", metavar="PATH", help="JSON or TOML balance definition")
+    args = parser.parse_args(argv)
+
+    difficulty = load_difficulty_model(args.difficulty) if args.difficulty else None
+    policy = SearchPolicy(args.budget, args.workers, args.iterations)
+    result = ArenaResult("search")
+    started = time.perf_counter_ns()
+    try:
+        for night in range(args.nights):
+            seed = night_seed(args.seed, night)
+            sim = NightSimulation(rng=random.Random(seed), difficulty=difficulty)
+            policy.reset(random.Random(f"{seed}/search"))
+            policy.bind(sim)
+            play_night(policy, sim, result)
+    finally:
+        policy.player.close()
+    result.wall_ns = time.perf_counter_ns() - started
+    print_results([result])
+    print(f"transposition hits {policy.player.hit_rate:.1%}, "
+          f"{len(policy.player.table)} states cached", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Snapshot, restore and fork of night and game state.
+
+A snapshot is a versioned little-endian blob of struct-packed fields: the
+power model's anchor, clock and office controls, every animatronic and
+the full Mersenne Twister state, so a restored night continues exactly as
+the original would have. The map and difficulty model are configuration,
+not state; restore binds them again and checks the map still matches.
+
+NightSnapshot holds the decoded state as immutable tuples. Every restore()
+builds a fresh simulation from those shared tuples, so one captured
+snapshot can branch thousands of futures without re-encoding anything,
+and forks never see each other's changes.
+
+Blob layout:
+    "<4sBBH" header (magic, version, kind, map size)
+    kind NIGHT: night fields, each animatronic, RNG state
+    kind GAME:  game fields, then a complete NIGHT blob
+"""
+
+import random
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from class_function import (Animatronic, DifficultyModel, GameState, LocationGraph,
+                            LOCATION_GRAPH, NightSimulation)
+from replay import OUTCOME_CODES
+
+MAGIC = b"FNBS"
+VERSION = 1
+KIND_NIGHT = 0
+KIND_GAME = 1
+
+HEADER = struct.Struct("<4sBBH")
+# time, power anchor (time, power, drain rate), hour, five controls,
+# current camera, outcome code, jumpscare roster index (-1 for none), roster size
+NIGHT = struct.Struct("<ddddi5?hbhH")
+ANIMATRONIC = struct.Struct("<hdi?B")  # location, move timer, AI level, active, name length
+RNG_WORDS = 625  # Mersenne Twister key plus position, as in random.getstate()
+RNG = struct.Struct(f"<{RNG_WORDS}I?d")  # state words, has gauss_next, gauss_next
+# state, seed, accumulator, previous power, jumpscare timer, bot's next decision,
+# then the left door, right door, left light, right light and camera cooldowns
+GAME = struct.Struct("<BQ9d")
+
+OUTCOMES = {code: outcome for outcome, code in OUTCOME_CODES.items()}
+
+NightFields = Tuple  # the NIGHT struct's fields, in order
+AnimatronicFields = Tuple[str, int, float, int, bool]
+
+
+class SnapshotError(ValueError):
+    """A blob that is not a snapshot, or not one this version can restore"""
+
+
+def _check_header(blob: bytes, kind: int, graph: LocationGraph) -> int:
+    if len(blob) < HEADER.size:
+        raise SnapshotError("blob is too short to be a snapshot")
+    magic, version, blob_kind, locations = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise SnapshotError("not a snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+    if blob_kind != kind:
+        raise SnapshotError(f"expected a {'game' if kind == KIND_GAME else 'night'} snapshot")
+    if locations != len(graph):
+        raise SnapshotError(f"snapshot is for a map of {locations} locations, not {len(graph)}")
+    return HEADER.size
+
+
+# ============= NIGHT =============
+
+class NightSnapshot:
+    """Decoded night state, shared read-only by every simulation restored from it"""
+
+    __slots__ = ("night", "animatronics", "rng_state")
+
+    def __init__(self, night: NightFields, animatronics: Tuple[AnimatronicFields, ...],
+                 rng_state: tuple):
+        self.night = night
+        self.animatronics = animatronics
+        self.rng_state = rng_state
+
+    @classmethod
+    def capture(cls, sim: NightSimulation) -> "NightSnapshot":
+        """The current state of a night, without serializing it"""
+        model = sim.power_model
+        roster = sim.animatronics
+        jumpscare = next((i for i, a in enumerate(roster) if a is sim.jumpscare_animatronic), -1)
+        night = (sim.time_elapsed, model.anchor_time, model.anchor_power, model.drain_rate,
+                 sim.game_hour, sim._left_door_closed, sim._right_door_closed,
+                 sim._left_light_on, sim._right_light_on, sim._camera_open,
+                 sim.current_camera.value, OUTCOME_CODES[sim.outcome], jumpscare, len(roster))
+        animatronics = tuple((a.name, a.location.value, a.move_timer, a.ai_level, a.active)
+                             for a in roster)
+        return cls(night, animatronics, sim.rng.getstate())
+
+    def restore(self, graph: LocationGraph = LOCATION_GRAPH,
+                difficulty: Optional[DifficultyModel] = None,
+                rng: Optional[random.Random] = None) -> NightSimulation:
+        """A new, independent simulation in this state.
+
+        By default it continues with the captured RNG state and replays the
+        original's future exactly; pass rng to branch a different future.
+        """
+        locations = graph.locations
+        roster = [Animatronic(name, locations[location], ai_level, move_timer, active)
+                  for name, location, move_timer, ai_level, active in self.animatronics]
+        if rng is None:
+            # Skip __init__'s seeding: setstate overwrites the whole state anyway
+            rng = random.Random.__new__(random.Random)
+            rng.setstate(self.rng_state)
+        sim = NightSimulation(roster, rng=rng, graph=graph, difficulty=difficulty)
+
+        # Controls are set behind their properties: the power model is anchored explicitly
+        (sim.time_elapsed, anchor_time, anchor_power, drain_rate, sim.game_hour,
+         sim._left_door_closed, sim._right_door_closed, sim._left_light_on,
+         sim._right_light_on, sim._camera_open, camera, outcome, jumpscare, _) = self.night
+        sim.power_model.rebase(anchor_time, anchor_power, drain_rate)
+        sim.current_camera = locations[camera]
+        sim.outcome = OUTCOMES[outcome]
+        sim.jumpscare_animatronic = sim.animatronics[jumpscare] if jumpscare >= 0 else None
+        return sim
+
+    def to_bytes(self, graph: LocationGraph = LOCATION_GRAPH) -> bytes:
+        parts = [HEADER.pack(MAGIC, VERSION, KIND_NIGHT, len(graph)), NIGHT.pack(*self.night)]
+        for name, location, move_timer, ai_level, active in self.animatronics:
+            encoded = name.encode()
+            parts.append(ANIMATRONIC.pack(location, move_timer, ai_level, active, len(encoded)))
+            parts.append(encoded)
+        version, internal, gauss_next = self.rng_state
+        parts.append(RNG.pack(*internal, gauss_next is not None, gauss_next or 0.0))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, graph: LocationGraph = LOCATION_GRAPH,
+                   offset: int = 0) -> "NightSnapshot":
+        pos = offset + _check_header(memoryview(blob)[offset:], KIND_NIGHT, graph)
+        try:
+            night = NIGHT.unpack_from(blob, pos)
+            pos += NIGHT.size
+            animatronics: List[AnimatronicFields] = []
+            for _ in range(night[-1]):
+                location, move_timer, ai_level, active, name_length = ANIMATRONIC.unpack_from(blob, pos)
+                pos += ANIMATRONIC.size
+                name = bytes(blob[pos:pos + name_length]).decode()
+                pos += name_length
+                animatronics.append((name, location, move_timer, ai_level, active))
+            words = RNG.unpack_from(blob, pos)
+        except struct.error as exc:
+            raise SnapshotError(f"truncated snapshot: {exc}") from None
+        gauss_next = words[-1] if words[-2] else None
+        return cls(night, tuple(animatronics), (3, words[:RNG_WORDS], gauss_next))
+
+
+def pack_night(sim: NightSimulation) -> bytes:
+    """Serialize a night to a snapshot blob"""
+    return NightSnapshot.capture(sim).to_bytes(sim.graph)
+
+
+def unpack_night(blob: bytes, graph: LocationGraph = LOCATION_GRAPH,
+                 difficulty: Optional[DifficultyModel] = None) -> NightSimulation:
+    """Rebuild a night from a blob made by pack_night"""
+    return NightSnapshot.from_bytes(blob, graph).restore(graph, difficulty)
+
+
+def fork(sim: NightSimulation, rng: Optional[random.Random] = None) -> NightSimulation:
+    """An independent copy of a running night, optionally with its own RNG"""
+    return NightSnapshot.capture(sim).restore(sim.graph, sim.difficulty, rng)
+
+
+# ============= GAME =============
+
+COOLDOWNS = ("left_door_cooldown", "right_door_cooldown", "left_light_cooldown",
+             "right_light_cooldown", "camera_cooldown")
+
+
+def pack_game(game) -> bytes:
+    """Serialize a Game's night plus the view state around it: screen, cooldowns, timers"""
+    sim = game.sim
+    header = HEADER.pack(MAGIC, VERSION, KIND_GAME, len(sim.graph))
+    fields = GAME.pack(game.state.value, game.seed, game.accumulator, game.previous_power,
+                       game.jumpscare_timer, getattr(game, "bot_next_decision", 0.0),
+                       *(getattr(game, name) for name in COOLDOWNS))
+    return header + fields + pack_night(sim)
+
+
+def unpack_game(blob: bytes, graph: LocationGraph = LOCATION_GRAPH) -> Tuple[Dict[str, object], NightSnapshot]:
+    """Game attributes and the night snapshot from a blob made by pack_game"""
+    pos = _check_header(blob, KIND_GAME, graph)
+    try:
+        fields = GAME.unpack_from(blob, pos)
+    except struct.error as exc:
+        raise SnapshotError(f"truncated snapshot: {exc}") from None
+    state, seed, accumulator, previous_power, jumpscare_timer, bot_next_decision = fields[:6]
+    attributes: Dict[str, object] = {
+        "state": GameState(state), "seed": seed, "accumulator": accumulator,
+        "previous_power": previous_power, "jumpscare_timer": jumpscare_timer,
+        "bot_next_decision": bot_next_decision,
+    }
+    attributes.update(zip(COOLDOWNS, fields[6:]))
+    return attributes, NightSnapshot.from_bytes(blob, graph, pos + GAME.size)
@@ -0,0 +1,114 @@
+"""
+Cold-start report for the game.
+
+Launches maingame.py --startup-report in a fresh interpreter under
+-X importtime and combines the import breakdown with the startup phases
+the game reports, so cold start can be tracked over time.
+
+Usage:
+    python startup.py [--runs 5] [--top 15] [--history startup.jsonl]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maingame.py")
+
+ImportRow = Tuple[str, int, int, int]  # module, self us, cumulative us, depth
+
+
+def parse_importtime(stderr: str) -> List[ImportRow]:
+    """Rows of a -X importtime log as (module, self_us, cumulative_us, depth)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_summary(rows: List[ImportRow]) -> Dict[str, int]:
+    """Cumulative microseconds of each top-level import, largest first"""
+    top = {name: cumulative for name, _, cumulative, depth in rows if depth == 0}
+    return dict(sorted(top.items(), key=lambda item: -item[1]))
+
+
+def measure_once(script: str = GAME_SCRIPT) -> Dict[str, object]:
+    """One cold start: wall time, import breakdown and the game's own phases"""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", script, "--startup-report"],
+                          capture_output=True, text=True, env=env, check=True)
+    wall = time.perf_counter() - started
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])["phases_ms"]
+    rows = parse_importtime(proc.stderr)
+    return {
+        "wall_ms": round(wall * 1000, 3),
+        "imports_ms": round(sum(r[1] for r in rows) / 1000, 3),
+        "phases_ms": phases,
+        "top_imports_us": import_summary(rows),
+    }
+
+
+def median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def measure(runs: int) -> Dict[str, object]:
+    """Median of several cold starts; the import breakdown is from the fastest"""
+    samples = [measure_once() for _ in range(runs)]
+    fastest = min(samples, key=lambda s: s["wall_ms"])
+    phases = {name: round(median([s["phases_ms"][name] for s in samples]), 3)
+              for name in fastest["phases_ms"]}
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": runs,
+        "wall_ms": round(median([s["wall_ms"] for s in samples]), 3),
+        "imports_ms": round(median([s["imports_ms"] for s in samples]), 3),
+        "phases_ms": phases,
+        "top_imports_us": fastest["top_imports_us"],
+    }
+
+
+def print_report(report: Dict[str, object], top: int, out=sys.stdout):
+    print(f"cold start {report['wall_ms']:.1f} ms wall (median of {report['runs']}), "
+          f"{report['imports_ms']:.1f} ms importing", file=out)
+    print("phases:", file=out)
+    for name, ms in report["phases_ms"].items():
+        print(f"  {name:<14} {ms:8.2f} ms", file=out)
+    print("top-level imports (cumulative):", file=out)
+    for name, us in list(report["top_imports_us"].items())[:top]:
+        print(f"  {name:<24} {us / 1000:8.2f} ms", file=out)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure and break down game cold start")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to take the median of")
+    parser.add_argument("--top", type=int, default=15, help="imports to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--history", help="append the report as one JSON line to this file")
+    args = parser.parse_args(argv)
+
+    report = measure(args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+    if args.history:
+        with open(args.history, "a") as out:
+            out.write(json.dumps(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Parallel sweep of AI-level grids against player policies.
+
+Every grid cell gets its own random.Random seeded from the master seed and
+the cell's parameters, never from the worker running it, so the merged table
+is identical for any --workers count.
+
+Policies are arena.py's: registered names or module:Class paths, playing
+from observations exactly as they do in the arena.
+
+Usage:
+    python sweep.py --freddy 0-20 --bonnie 0-20 --chica 0-20 --policies idle,lights \\
+        --nights 50 --workers 8 --seed 1 --output sweep.csv
+
+--scheduler events runs nights on the next-event scheduler, consulting the
+policy after every event instead of every decision interval. --difficulty
+loads a balance definition (see class_function.DifficultyModel.from_config).
+"""
+
+import argparse
+import csv
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import product
+from typing import List, Dict, Tuple, Iterable, Optional
+
+from arena import ArenaResult, DECISION_INTERVAL, POLICIES, Policy, make_policy, play_night
+from class_function import (GameState, NightSimulation, DifficultyModel,
+                            DEFAULT_DIFFICULTY, FINAL_HOUR, create_animatronics,
+                            load_difficulty_model)
+
+SWEEP_DT = 1 / 60
+SCHEDULERS = ("fixed", "events")
+
+
+# ============= SWEEP =============
+
+def cell_rng(master_seed: int, levels: Tuple[int, ...], policy: str,
+             stream: str = "night") -> random.Random:
+    """Independent, reproducible RNG stream for one grid cell"""
+    # String seeds are hashed with SHA-512, so they are stable across processes
+    return random.Random(f"{master_seed}/{'/'.join(map(str, levels))}/{policy}/{stream}")
+
+
+Cell = Tuple[int, Tuple[int, ...], str, int, str, Optional[str], float]
+
+
+@lru_cache(maxsize=None)
+def difficulty_model(path: Optional[str]) -> DifficultyModel:
+    """Balance tables for a cell, built once per worker process"""
+    return load_difficulty_model(path) if path else DEFAULT_DIFFICULTY
+
+
+def run_cell(cell: Cell) -> Dict[str, object]:
+    """Simulate every night of one grid cell and return its result row"""
+    master_seed, levels, policy_name, nights, scheduler, difficulty, decision_interval = cell
+    policy = make_policy(policy_name)
+    names = roster_names()
+    rng = cell_rng(master_seed, levels, policy_name)
+    # The policy draws from its own stream, so its choices never shift the night's dice
+    policy_rng = cell_rng(master_seed, levels, policy_name, "policy")
+    played = ArenaResult(policy_name)
+
+    wins = 0
+    death_hours = [0] * (FINAL_HOUR + 1)
+    kills: Dict[str, int] = {}
+    sim = NightSimulation(rng=rng, difficulty=difficulty_model(difficulty))
+    for _ in range(nights):
+        roster = create_animatronics()
+        for anim, level in zip(roster, levels):
+            anim.ai_level = level
+        sim.reset(roster)
+        policy.reset(policy_rng)
+        policy.bind(sim)
+        if scheduler == "events":
+            consult(policy, sim)
+            sim.run_events(lambda sim: consult(policy, sim))
+        else:
+            play_night(policy, sim, played, SWEEP_DT, decision_interval)
+        if sim.outcome == GameState.WIN:
+            wins += 1
+        else:
+            death_hours[min(sim.game_hour, FINAL_HOUR)] += 1
+            name = sim.jumpscare_animatronic.name
+            kills[name] = kills.get(name, 0) + 1
+
+    row: Dict[str, object] = {name.lower(): level for name, level in zip(names, levels)}
+    row.update(policy=policy_name, nights=nights, wins=wins,
+               win_rate=round(wins / nights, 6) if nights else 0.0)
+    for hour, count in enumerate(death_hours):
+        row[f"deaths_h{hour}"] = count
+    for name in names:
+        row[f"{name.lower()}_kills"] = kills.get(name, 0)
+    return row
+
+
+def consult(policy: Policy, sim: NightSimulation):
+    """Let the policy look at the office once and apply what it decides"""
+    for action, arg in policy.act(sim.observe()):
+        sim.apply(action, arg)
+
+
+def roster_names() -> List[str]:
+    """Names of the default roster, in grid-axis order"""
+    return [a.name for a in create_animatronics()]
+
+
+def build_cells(master_seed: int, level_axes: List[Iterable[int]], policies: List[str],
+                nights: int, scheduler: str = "fixed", difficulty: Optional[str] = None,
+                decision_interval: float = DECISION_INTERVAL) -> List[Cell]:
+    """Expand the parameter grid into cells in a fixed, worker-independent order"""
+    return [(master_seed, levels, policy, nights, scheduler, difficulty, decision_interval)
+            for levels in product(*level_axes)
+            for policy in policies]
+
+
+def run_sweep(cells: List[Cell], workers: int = 1) -> List[Dict[str, object]]:
+    """Run cells across a process pool and merge rows in grid order"""
+    if workers <= 1:
+        return [run_cell(cell) for cell in cells]
+    # Several cells per task keeps IPC overhead low on large grids
+    chunksize = max(1, len(cells) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_cell, cells, chunksize=chunksize))
+
+
+def parse_levels(spec: str) -> List[int]:
+    """Parse an AI-level axis like '0-20', '3' or '0,5,10'"""
+    levels: List[int] = []
+    for part in spec.split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            levels.extend(range(int(low), int(high) + 1))
+        else:
+            levels.append(int(part))
+    return levels
+
+
+def write_table(rows: List[Dict[str, object]], out):
+    """Write merged rows as CSV"""
+    if not rows:
+        return
+    writer = csv.DictWriter(out, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep AI levels against player policies")
+    for anim in create_animatronics():
+        parser.add_argument(f"--{anim.name.lower()}", default=str(anim.ai_level),
+                            help=f"{anim.name} AI levels, e.g. 0-20 (default {anim.ai_level})")
+    parser.add_argument("--policies", default="idle,lights",
+                        help=f"comma-separated policies ({', '.join(POLICIES)}) or module:Class")
+    parser.add_argument("--nights", type=int, default=20, help="nights per grid cell")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--scheduler", choices=SCHEDULERS, default="fixed",
+                        help="fixed-step ticks or next-event scheduling")
+    parser.add_argument("--decision-interval", type=float, default=DECISION_INTERVAL,
+                        help="seconds of night time between decisions with the fixed scheduler")
+    parser.add_argument("--difficulty", metavar="PATH",
+                        help="JSON or TOML balance definition (default built-in curves)")
+    parser.add_argument("--output", help="CSV path (default stdout)")
+    args = parser.parse_args(argv)
+
+    policies = args.policies.split(",")
+    for name in policies:
+        try:
+            make_policy(name)
+        except (ValueError, ImportError, AttributeError) as exc:
+            parser.error(f"cannot load policy {name!r}: {exc}")
+
+    axes = [parse_levels(getattr(args, name.lower())) for name in roster_names()]
+    cells = build_cells(args.seed, axes, policies, args.nights, args.scheduler, args.difficulty,
+                        args.decision_interval)
+    rows = run_sweep(cells, args.workers)
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_table(rows, out)
+    else:
+        write_table(rows, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
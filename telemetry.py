@@ -0,0 +1,431 @@
+"""
+Streaming gameplay telemetry.
+
+The game pushes small event tuples into a preallocated ring buffer and a
+background thread drains it, encodes one JSON object per line and writes
+gzip-compressed files that rotate by size. The frame loop never waits on
+the writer: when the ring is full, events are dropped and counted.
+
+Every line carries the night id (the night's seed in hex, as in replay
+file names), the night time t in seconds and an event kind:
+    start    seed, roster names, initially selected camera
+    resume   the night continues from a snapshot: selected camera, monitor up
+    power    power level, sampled every POWER_SAMPLE_INTERVAL seconds
+    action   player action name, with the camera name for "SELECT_CAMERA"
+    arrive   an animatronic reached a door: name, door
+    end      outcome ("win", "jumpscare" or "power_out"), killer, power left
+    dropped  events lost to a full ring since the previous line of this kind
+
+The aggregator streams the files back one line at a time and keeps only
+per-night counters, so memory stays flat however many nights are logged.
+
+Usage:
+    python telemetry.py telemetry/ [--json]
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from class_function import Action, Animatronic, GameState, Location, NightSimulation, NIGHT_LENGTH
+
+RING_CAPACITY = 4096
+FLUSH_INTERVAL = 1.0  # seconds between writer wake-ups
+MAX_FILE_BYTES = 8 * 1024 * 1024  # compressed size at which a file is rotated
+POWER_SAMPLE_INTERVAL = 1.0  # night seconds between power samples
+FILE_PATTERN = "telemetry-*.jsonl.gz"
+
+
+# ============= RING BUFFER =============
+
+class EventRing:
+    """Fixed-capacity single-producer, single-consumer queue of event tuples.
+
+    The producer only advances head and the consumer only advances tail,
+    so neither side waits on the other. push() never blocks: with the ring
+    full it drops the event and counts it instead. Crossing half full sets
+    the half_full event so a sleeping consumer can drain early.
+    """
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self._slots: List[Optional[tuple]] = [None] * capacity
+        self._head = 0  # total events pushed
+        self._tail = 0  # total events drained
+        self._watermark = capacity // 2
+        self.dropped = 0
+        self.half_full = threading.Event()
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def push(self, event: tuple) -> bool:
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self._slots[head % self.capacity] = event
+        self._head = head + 1
+        if head - self._tail == self._watermark:
+            self.half_full.set()
+        return True
+
+    def drain(self) -> List[tuple]:
+        """Remove and return every event pushed so far, oldest first"""
+        tail, head = self._tail, self._head
+        slots, capacity = self._slots, self.capacity
+        events = [slots[i % capacity] for i in range(tail, head)]
+        for i in range(tail, head):
+            slots[i % capacity] = None
+        self._tail = head
+        return events
+
+
+# ============= WRITER =============
+
+def encode(event: tuple) -> dict:
+    """JSON object for one (kind, night, t, *fields) event tuple"""
+    kind, night, t = event[:3]
+    line = {"night": night, "t": round(t, 3), "event": kind}
+    if kind == "start":
+        line["seed"], line["roster"], line["camera"] = event[3:]
+    elif kind == "resume":
+        line["camera"], line["camera_open"] = event[3:]
+    elif kind == "power":
+        line["power"] = round(event[3], 3)
+    elif kind == "action":
+        line["action"] = event[3].name
+        if event[4] is not None:
+            line["camera"] = event[4]
+    elif kind == "arrive":
+        line["name"], line["door"] = event[3:]
+    elif kind == "end":
+        line["outcome"], line["killer"], line["power"] = event[3:]
+    elif kind == "dropped":
+        line["count"] = event[3]
+    return line
+
+
+class TelemetryWriter(threading.Thread):
+    """Background thread writing drained events to rotating gzip JSONL files"""
+
+    def __init__(self, ring: EventRing, directory: str, flush_interval: float = FLUSH_INTERVAL,
+                 max_file_bytes: int = MAX_FILE_BYTES):
+        super().__init__(name="telemetry-writer", daemon=True)
+        self.ring = ring
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self._stop_requested = threading.Event()
+        self._raw = None
+        self._file = None
+        self._file_index = 0
+        self._reported_drops = 0
+        self.paths: List[str] = []
+
+    def run(self):
+        wake = self.ring.half_full
+        while not self._stop_requested.is_set():
+            wake.wait(self.flush_interval)
+            wake.clear()
+            self.flush()
+        self.flush()
+        self._close_file()
+
+    def stop(self):
+        """Write out everything pushed so far and end the thread"""
+        self._stop_requested.set()
+        self.ring.half_full.set()
+        self.join()
+
+    def flush(self):
+        events = self.ring.drain()
+        dropped = self.ring.dropped
+        if dropped > self._reported_drops:
+            events.append(("dropped", None, 0.0, dropped - self._reported_drops))
+            self._reported_drops = dropped
+        if not events:
+            return
+        data = "".join(json.dumps(encode(event), separators=(",", ":")) + "\n" for event in events)
+        if self._file is None:
+            self._open_file()
+        self._file.write(data.encode())
+        # A sync flush makes everything so far readable even if the game dies
+        self._file.flush(zlib.Z_SYNC_FLUSH)
+        if self._raw.tell() >= self.max_file_bytes:
+            self._close_file()
+
+    def _open_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        name = time.strftime("telemetry-%Y%m%d-%H%M%S") + f"-{os.getpid()}-{self._file_index:03d}.jsonl.gz"
+        path = os.path.join(self.directory, name)
+        self._file_index += 1
+        self._raw = open(path, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self.paths.append(path)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+            self._file = self._raw = None
+
+
+# ============= RECORDING =============
+
+class Telemetry:
+    """Game-side recorder: turns night state changes into ring buffer events.
+
+    Every hook is a few attribute reads and one push; encoding, compression
+    and file I/O all happen on the writer thread.
+    """
+
+    def __init__(self, ring: EventRing, writer: Optional[TelemetryWriter] = None):
+        self.ring = ring
+        self.writer = writer
+        self.night: Optional[str] = None
+        self._sim: Optional[NightSimulation] = None
+        self._next_sample = 0.0
+
+    @classmethod
+    def create(cls, directory: str, capacity: int = RING_CAPACITY) -> "Telemetry":
+        """Start a writer thread logging to the given directory"""
+        ring = EventRing(capacity)
+        writer = TelemetryWriter(ring, directory)
+        writer.start()
+        return cls(ring, writer)
+
+    def night_start(self, sim: NightSimulation, seed: int):
+        self._attach(sim, seed)
+        self.ring.push(("start", self.night, sim.time_elapsed, seed,
+                        [anim.name for anim in sim.animatronics], sim.current_camera.name))
+        self.tick(sim)
+
+    def night_resume(self, sim: NightSimulation, seed: int):
+        """Follow a night restored from a snapshot, under its original night id"""
+        self._attach(sim, seed)
+        self.ring.push(("resume", self.night, sim.time_elapsed, sim.current_camera.name,
+                        sim.camera_open))
+        self.tick(sim)
+
+    def _attach(self, sim: NightSimulation, seed: int):
+        self._detach()
+        self.night = f"{seed:016x}"
+        self._sim = sim
+        self._next_sample = sim.time_elapsed
+        sim.animatronics.subscribe(self._on_move)
+
+    def _on_move(self, anim: Animatronic, old: Location, new: Location):
+        if new in self._sim.graph.doors:
+            self.ring.push(("arrive", self.night, self._sim.time_elapsed, anim.name, new.name))
+
+    def action(self, sim: NightSimulation, action: Action, arg: Optional[int] = None):
+        camera = sim.graph.locations[arg].name if action == Action.SELECT_CAMERA else None
+        self.ring.push(("action", self.night, sim.time_elapsed, action, camera))
+
+    def tick(self, sim: NightSimulation):
+        """Sample power when due; call after every simulation step"""
+        if sim.time_elapsed >= self._next_sample:
+            self.ring.push(("power", self.night, sim.time_elapsed, sim.power))
+            self._next_sample += POWER_SAMPLE_INTERVAL
+
+    def night_end(self, sim: NightSimulation):
+        if self.night is None:
+            return
+        if sim.outcome == GameState.WIN:
+            outcome, killer = "win", None
+        else:
+            # check_power_out runs after the moves, so an empty battery wins any tie
+            outcome = "power_out" if sim.power <= 0 else "jumpscare"
+            killer = sim.jumpscare_animatronic.name if sim.jumpscare_animatronic else None
+        self.ring.push(("end", self.night, sim.time_elapsed, outcome, killer, round(sim.power, 3)))
+        self._detach()
+
+    def _detach(self):
+        if self._sim is not None:
+            self._sim.animatronics.unsubscribe(self._on_move)
+        self._sim = None
+        self.night = None
+
+    def close(self):
+        """Stop the writer after it has written every pending event"""
+        self._detach()
+        if self.writer is not None:
+            self.writer.stop()
+
+
+# ============= AGGREGATION =============
+
+def iter_events(paths: Iterable[str]) -> Iterator[dict]:
+    """Events from telemetry files in order, one line in memory at a time"""
+    for path in paths:
+        with gzip.open(path, "rt") as lines:
+            try:
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+            except EOFError:
+                # Still being written, or the game died: keep what was synced
+                continue
+
+
+def telemetry_files(target: str) -> List[str]:
+    """The telemetry files in a directory, oldest first, or just the given file"""
+    if os.path.isdir(target):
+        return sorted(glob.glob(os.path.join(target, FILE_PATTERN)))
+    return [target]
+
+
+class _NightState:
+    __slots__ = ("camera", "camera_open", "opened_at", "doors_reached")
+
+    def __init__(self, camera: str):
+        self.camera = camera
+        self.camera_open = False
+        self.opened_at = 0.0
+        self.doors_reached = set()
+
+
+class Aggregate:
+    """Running totals over every night seen; only open nights hold state"""
+
+    def __init__(self):
+        self.nights = 0
+        self.abandoned = 0
+        self.dropped_events = 0
+        self.outcomes: Counter = Counter()
+        self.killers: Counter = Counter()
+        self.actions: Counter = Counter()
+        self.camera_dwell: Counter = Counter()  # seconds of monitor time per camera
+        self.arrivals: Counter = Counter()  # door -> arrivals
+        self.arrival_time: Counter = Counter()  # door -> summed arrival times
+        self.first_arrival_time: Counter = Counter()  # door -> summed first arrival per night
+        self.first_arrivals: Counter = Counter()
+        self.power_sum: Counter = Counter()  # game hour -> summed power samples
+        self.power_samples: Counter = Counter()
+        self._open: Dict[str, _NightState] = {}
+
+    def add(self, event: dict):
+        kind = event["event"]
+        night = event["night"]
+        t = event["t"]
+        if kind == "dropped":
+            self.dropped_events += event["count"]
+            return
+        if kind == "start":
+            if night in self._open:
+                self.abandoned += 1
+            self._open[night] = _NightState(event["camera"])
+            return
+        if kind == "resume":
+            # Monitor time up to a crash is unknown, so dwell restarts here
+            state = self._open.setdefault(night, _NightState(event["camera"]))
+            state.camera = event["camera"]
+            state.camera_open, state.opened_at = event["camera_open"], t
+            return
+        state = self._open.get(night)
+        if state is None:
+            return  # the start of this night was in a file we did not read
+        if kind == "power":
+            hour = min(int(t / NIGHT_LENGTH * 6), 6)
+            self.power_sum[hour] += event["power"]
+            self.power_samples[hour] += 1
+        elif kind == "action":
+            action = event["action"]
+            self.actions[action] += 1
+            if action == "OPEN_CAMERA" and not state.camera_open:
+                state.camera_open, state.opened_at = True, t
+            elif action == "CLOSE_CAMERA" and state.camera_open:
+                self.camera_dwell[state.camera] += t - state.opened_at
+                state.camera_open = False
+            elif action == "SELECT_CAMERA":
+                if state.camera_open:
+                    self.camera_dwell[state.camera] += t - state.opened_at
+                    state.opened_at = t
+                state.camera = event["camera"]
+        elif kind == "arrive":
+            door = event["door"]
+            self.arrivals[door] += 1
+            self.arrival_time[door] += t
+            if door not in state.doors_reached:
+                state.doors_reached.add(door)
+                self.first_arrivals[door] += 1
+                self.first_arrival_time[door] += t
+        elif kind == "end":
+            if state.camera_open:
+                self.camera_dwell[state.camera] += t - state.opened_at
+            self.nights += 1
+            self.outcomes[event["outcome"]] += 1
+            if event["killer"]:
+                self.killers[event["killer"]] += 1
+            del self._open[night]
+
+    def summary(self) -> dict:
+        nights = self.nights or 1
+        return {
+            "nights": self.nights,
+            "abandoned": self.abandoned + len(self._open),
+            "dropped_events": self.dropped_events,
+            "win_rate": self.outcomes["win"] / nights,
+            "outcomes": dict(self.outcomes),
+            "killers": dict(self.killers),
+            "actions_per_night": {name: count / nights for name, count in sorted(self.actions.items())},
+            "camera_seconds_per_night": {name: round(s / nights, 3)
+                                         for name, s in self.camera_dwell.most_common()},
+            "door_arrivals_per_night": {door: n / nights for door, n in sorted(self.arrivals.items())},
+            "mean_arrival_time": {door: round(self.arrival_time[door] / n, 3)
+                                  for door, n in sorted(self.arrivals.items())},
+            "mean_first_arrival_time": {door: round(self.first_arrival_time[door] / n, 3)
+                                        for door, n in sorted(self.first_arrivals.items())},
+            "mean_power_by_hour": {hour: round(self.power_sum[hour] / n, 2)
+                                   for hour, n in sorted(self.power_samples.items())},
+        }
+
+
+def aggregate(paths: Iterable[str]) -> dict:
+    """Summary of every night in the given telemetry files"""
+    totals = Aggregate()
+    for event in iter_events(paths):
+        totals.add(event)
+    return totals.summary()
+
+
+def print_summary(summary: dict, out=sys.stdout):
+    print(f"{summary['nights']} nights, win rate {summary['win_rate']:.1%}, "
+          f"{summary['abandoned']} abandoned, {summary['dropped_events']} events dropped", file=out)
+    for title, key in (("outcomes", "outcomes"), ("killers", "killers"),
+                       ("actions per night", "actions_per_night"),
+                       ("camera seconds per night", "camera_seconds_per_night"),
+                       ("door arrivals per night", "door_arrivals_per_night"),
+                       ("mean first arrival (s)", "mean_first_arrival_time"),
+                       ("mean power by hour", "mean_power_by_hour")):
+        print(f"{title}:", file=out)
+        for name, value in summary[key].items():
+            text = f"{value:.3f}" if isinstance(value, float) else str(value)
+            print(f"  {str(name):<16} {text:>10}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate gameplay telemetry")
+    parser.add_argument("paths", nargs="+", help="telemetry directories or .jsonl.gz files")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    files = [path for target in args.paths for path in telemetry_files(target)]
+    summary = aggregate(files)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
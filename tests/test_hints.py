@@ -0,0 +1,46 @@
+"""Hints search a frozen copy of what the player knew when they asked"""
+
+import random
+
+from belief import Belief
+from class_function import Action, GameState, NightSimulation
+from search import HintSearch
+
+
+def watch_start_node(sim: NightSimulation):
+    """Raise the monitor on the start node, where the whole roster begins"""
+    sim.apply(Action.OPEN_CAMERA)
+    sim.apply(Action.SELECT_CAMERA, sim.graph.start.value)
+
+
+def test_hint_survives_view_change():
+    sim = NightSimulation(rng=random.Random(1))
+    belief = Belief(sim)
+    watch_start_node(sim)
+    hint = HintSearch(sim, belief, 50, 0)
+    sim.apply(Action.CLOSE_CAMERA)
+    belief.observe(sim.observe())
+    assert belief.watched == {}
+    assert hint.step(10.0) is not None
+    assert set(hint.belief.watched) == {sim.graph.start}
+
+
+def test_game_hint_survives_view_change():
+    import maingame
+    game = maingame.Game(fps=0)
+    try:
+        game.start_night()
+        game.perform(Action.OPEN_CAMERA)
+        game.perform(Action.SELECT_CAMERA, game.sim.graph.start.value)
+        game.show_hint()
+        game.perform(Action.CLOSE_CAMERA)
+        game.perform(Action.TOGGLE_LEFT_LIGHT)
+        for _ in range(1000):
+            game.advance(1 / 60)
+            game.update_hint()
+            if game.hint_search is None:
+                break
+        assert game.state == GameState.PLAYING
+        assert game.hint is not None
+    finally:
+        game.shutdown()